@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+'''
+Benchmark of the accuracy profiles (config key "accuracy_profile"): wall time vs. deviation of the results.
+
+The same simulation is run with every profile, the results are compared against the most accurate profile:
+    - thermalZone.TAir: max abs and RMS deviation
+    - heating energy: integral of totalHeatingPower.y over the output times and its relative deviation
+
+Run from the repository root:
+    python -m benchmarks.benchmark_accuracy_profiles
+'''
+import os
+import sys
+import time
+import numpy as np
+from src.utils.config import Config
+from src.variator import Variator
+from src.simulations.simulation_controller import SimulationController
+
+#======================
+#start of benchmark config section
+#======================
+benchmark_config={
+    "config_path":os.path.join("resources","configurations","config_example_singleFamilyHouse.json"),
+    "fmu_name_windows":"Model_v1_interiorWalls_Floor_Roof_Pctrl_windows_openmodelica_v2.fmu",
+    "fmu_name_linux":"Model_v1_interiorWalls_Floor_Roof_Pctrl_linux_openmodelica_v2.fmu",
+    "cache_path":"cache",
+    #profiles to compare, the last profile is the reference
+    "profiles":["screening", "default", "validation"],
+    "n_repetitions":2,
+    "temperature_column":"thermalZone.TAir",
+    "heating_power_column":"totalHeatingPower.y",
+    #overrides of the config
+    "config_overrides":{
+        "stop_time":30*86400
+    }
+}
+#======================
+#end of benchmark config section
+#======================
+
+
+def run_simulation(config: Config, variation: list):
+    '''
+    Run one simulation.
+
+    Returns:
+        tuple: results, output columns, StepPlan and runtime in seconds
+    '''
+    t_start = time.perf_counter()
+    worker = SimulationController(worker_id=1, config=config, variation=variation)
+    results, out_cols, _ = worker.simulate_fmu()
+    worker.fmu_wrapper.terminate_fmu()
+    return results, out_cols, worker.step_plan, time.perf_counter() - t_start
+
+
+def get_heating_energy(results, out_cols):
+    '''
+    Get the heating energy in kWh from the heating power at the output times (rectangle rule).
+    '''
+    timestamps = results[:, out_cols.index("timestamp")]
+    heating_power = results[:, out_cols.index(benchmark_config["heating_power_column"])]
+    return float(np.sum(heating_power[:-1] * np.diff(timestamps))) / 3.6e6
+
+
+if __name__ == "__main__":
+    if sys.platform=="win32":   fmu_name=benchmark_config["fmu_name_windows"]
+    else:                       fmu_name=benchmark_config["fmu_name_linux"]
+    fmu_path=os.path.join("resources","FMUs",fmu_name)
+
+    config = Config(benchmark_config["config_path"], fmu_path, "output", benchmark_config["cache_path"])
+    config.config.update(benchmark_config["config_overrides"])
+    config.fmu_cache.extract()
+    variation = Variator(config.get("variations"), config.get("variation_type")).variation_combinations[0]
+
+    runs = dict()
+    for accuracy_profile in benchmark_config["profiles"]:
+        config.config["accuracy_profile"] = accuracy_profile
+        profile_runs = [run_simulation(config, variation) for _ in range(benchmark_config["n_repetitions"])]
+        results, out_cols, step_plan, _ = profile_runs[-1]
+        runs[accuracy_profile] = (results, out_cols, step_plan, min(run[3] for run in profile_runs))
+    config.fmu_cache.cleanup()
+
+    results_reference, out_cols_reference, _, runtime_reference = runs[benchmark_config["profiles"][-1]]
+    temperature_reference = results_reference[:, out_cols_reference.index(benchmark_config["temperature_column"])]
+    energy_reference = get_heating_energy(results_reference, out_cols_reference)
+
+    print(f"\nsimulated time: {config.get('stop_time')-config.get('start_time')} s, reference: {benchmark_config['profiles'][-1]} (best of {benchmark_config['n_repetitions']} runs)")
+    for accuracy_profile, (results, out_cols, step_plan, runtime) in runs.items():
+        temperature_diff = results[:, out_cols.index(benchmark_config["temperature_column"])] - temperature_reference
+        energy = get_heating_energy(results, out_cols)
+        print(f"\t{accuracy_profile:10}\t{config.ACCURACY_PROFILES[accuracy_profile]}\thalting points: {len(step_plan):7}\truntime: {runtime:.2f} s ({runtime_reference/runtime:.2f}x)"
+              f"\n\t\t\t{benchmark_config['temperature_column']} max abs: {np.abs(temperature_diff).max():.3e} K, RMS: {np.sqrt(np.mean(temperature_diff**2)):.3e} K"
+              f"\theating energy: {energy:.2f} kWh ({(energy-energy_reference)/energy_reference*100:+.3f} %)")
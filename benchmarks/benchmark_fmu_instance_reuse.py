@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+'''
+Benchmark of the per-variation FMU setup time with and without reuse of FMU instances (see FMUInstancePool).
+
+Two setup times are measured per variation, without simulating:
+    - FMU instance: getting an FMU instance (instantiate or reset) and setupExperiment, then terminating it again
+    - full setup: setting up a SimulationController (FMU instance, converter functions, initialization, 
+      parameterization, controllers and step sizes) and terminating the FMU again
+
+Run from the repository root:
+    python -m benchmarks.benchmark_fmu_instance_reuse
+'''
+import os
+import sys
+import time
+import numpy as np
+from src.utils.config import Config
+from src.variator import Variator
+from src.simulations.simulation_controller import SimulationController
+from src.fmuwrapper import FMUWrapper
+from src.utils.fmu_instance_pool import clear_instance_pools, get_instance_pool
+
+#======================
+#start of benchmark config section
+#======================
+benchmark_config={
+    "config_path":os.path.join("resources","configurations","config_example_singleFamilyHouse.json"),
+    "fmu_name_windows":"Model_v1_interiorWalls_Floor_Roof_Pctrl_windows_openmodelica_v2.fmu",
+    "fmu_name_linux":"Model_v1_interiorWalls_Floor_Roof_Pctrl_linux_openmodelica_v2.fmu",
+    "cache_path":"cache",
+    "n_variations":20
+}
+#======================
+#end of benchmark config section
+#======================
+
+
+def time_fmu_instances(config: Config, n_variations: int):
+    '''
+    Get and terminate one FMU instance per variation.
+
+    Returns:
+        np.ndarray with the setup time per variation in seconds.
+    '''
+    setup_times = []
+    for _ in range(n_variations):
+        t_start = time.perf_counter()
+        fmu_wrapper = FMUWrapper(fmu_path=config.fmu_path, 
+                                 start_time=config.get("start_time"),
+                                 fmu_cache=config.fmu_cache,
+                                 instance_pool=get_instance_pool(config.fmu_cache) if config.reuse_fmu_instances else None)
+        fmu_wrapper.terminate_fmu()
+        setup_times.append(time.perf_counter() - t_start)
+    return np.array(setup_times)
+
+
+def time_setups(config: Config, variation_list: list):
+    '''
+    Set up one SimulationController per variation and terminate its FMU.
+
+    Returns:
+        np.ndarray with the setup time per variation in seconds.
+    '''
+    setup_times = []
+    for variation in variation_list:
+        t_start = time.perf_counter()
+        worker = SimulationController(worker_id=1, config=config, variation=variation)
+        worker.fmu_wrapper.terminate_fmu()
+        setup_times.append(time.perf_counter() - t_start)
+    return np.array(setup_times)
+
+
+if __name__ == "__main__":
+    if sys.platform=="win32":   fmu_name=benchmark_config["fmu_name_windows"]
+    else:                       fmu_name=benchmark_config["fmu_name_linux"]
+    fmu_path=os.path.join("resources","FMUs",fmu_name)
+
+    results = {"FMU instance": dict(), "full setup": dict()}
+    for reuse_fmu_instances in [False, True]:
+        config = Config(benchmark_config["config_path"], fmu_path, "output", benchmark_config["cache_path"], reuse_fmu_instances)
+        config.fmu_cache.extract()
+        config.fmu_cache.get_model_info()
+        variation = Variator(config.get("variations"), config.get("variation_type")).variation_combinations[0]
+        results["FMU instance"][reuse_fmu_instances] = time_fmu_instances(config, benchmark_config["n_variations"])
+        clear_instance_pools()
+        results["full setup"][reuse_fmu_instances] = time_setups(config, [variation]*benchmark_config["n_variations"])
+        clear_instance_pools()
+
+    config.fmu_cache.cleanup()
+
+    print(f"\nsetup time per variation ({benchmark_config["n_variations"]} variations, first variation excluded from mean):")
+    for measurement, measurement_results in results.items():
+        print(f"{measurement}:")
+        for reuse_fmu_instances, setup_times in measurement_results.items():
+            print(f"\treuse_fmu_instances={str(reuse_fmu_instances):5}\tfirst: {setup_times[0]*1000:.1f} ms\tmean: {setup_times[1:].mean()*1000:.1f} ms\tmin: {setup_times[1:].min()*1000:.1f} ms")
+        print(f"\tspeedup (mean): {measurement_results[False][1:].mean()/measurement_results[True][1:].mean():.2f}x")
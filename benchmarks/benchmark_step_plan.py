@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+'''
+Benchmark of the bookkeeping overhead of the simulation loop (without FMU calls):
+per-step modulo checks on the step size lists vs. walking a precompiled StepPlan.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_step_plan
+'''
+import time
+from src.simulations.step_plan import StepPlan, get_step_plan
+from src.utils.util_functions import get_step_size_arr
+
+#======================
+#start of benchmark config section
+#======================
+benchmark_config={
+    "start_time":0,
+    "stop_time":31536000,           #one year
+    "writer_step_size":900,
+    "controller_step_size":900,
+    "max_permitted_time_step":300,  #resolution of the window opening profiles
+    "n_repetitions":5
+}
+#======================
+#end of benchmark config section
+#======================
+
+
+def walk_modulo_checks(step_size_arr, start_times, writer_step_size, controller_step_size):
+    '''
+    Walk the halting points like the simulation loop did before the StepPlan:
+    time bookkeeping and calls of the modulo check functions at every halting point.
+
+    Returns:
+        tuple: number of control and output halting points
+    '''
+    config = {"writer_step_size": writer_step_size}
+    controllers = [object()]
+    def perform_control_check(curr_time_relative): #like ControllerWrapper.perform_control_check
+        return any(controllers) and curr_time_relative % controller_step_size == 0
+    def generate_output_check(curr_time_relative): #like the former SimulationController.generate_output_check
+        return curr_time_relative % config.get("writer_step_size") == 0
+
+    n_control = n_output = 0
+    for index, schedule in enumerate(step_size_arr):
+        curr_time = start_times[index]
+        for step_size in schedule:
+            curr_time_relative = curr_time - start_times[index]
+            b_perform_control = perform_control_check(curr_time_relative=curr_time_relative)
+            b_generate_output = generate_output_check(curr_time_relative=curr_time_relative)
+            if b_perform_control or b_generate_output:
+                read_plan_key = (b_perform_control, b_generate_output)
+                n_control += read_plan_key[0]
+                n_output += read_plan_key[1]
+            curr_time += step_size
+    return n_control, n_output
+
+
+def walk_step_plan(step_plan: StepPlan):
+    '''
+    Walk the halting points of a StepPlan like the simulation loop does.
+
+    Returns:
+        tuple: number of control and output halting points
+    '''
+    n_control = n_output = 0
+    for step_size, flags, group in step_plan:
+        actions = flags & (StepPlan.CONTROL | StepPlan.OUTPUT)
+        if actions:
+            n_control += actions & StepPlan.CONTROL
+            n_output += (actions & StepPlan.OUTPUT) >> 1
+    return n_control, n_output
+
+
+def best_of(function, *args):
+    '''
+    Get the minimal runtime of a function over n_repetitions and its return value.
+    '''
+    runtimes = []
+    for _ in range(benchmark_config["n_repetitions"]):
+        t_start = time.perf_counter()
+        result = function(*args)
+        runtimes.append(time.perf_counter() - t_start)
+    return min(runtimes), result
+
+
+if __name__ == "__main__":
+    time_args = [benchmark_config[k] for k in ["start_time", "stop_time", "writer_step_size", "controller_step_size", "max_permitted_time_step"]]
+
+    t_step_size_arr, step_size_arr = best_of(get_step_size_arr, *time_args)
+    t_step_plan, step_plan = best_of(get_step_plan, *time_args)
+    print(step_plan)
+
+    t_modulo, counts_modulo = best_of(walk_modulo_checks, [step_size_arr.tolist()], [benchmark_config["start_time"]],
+                                      benchmark_config["writer_step_size"], benchmark_config["controller_step_size"])
+    t_plan, counts_plan = best_of(walk_step_plan, step_plan)
+    assert counts_modulo == counts_plan, f"halting point actions differ: {counts_modulo} vs. {counts_plan}"
+
+    print(f"\nbookkeeping time for {len(step_plan)} halting points (best of {benchmark_config["n_repetitions"]}):")
+    print(f"\tcompile step size array:\t{t_step_size_arr*1000:.1f} ms\twalk with modulo checks:\t{t_modulo*1000:.1f} ms")
+    print(f"\tcompile StepPlan:\t{t_step_plan*1000:.1f} ms\twalk StepPlan:\t\t\t{t_plan*1000:.1f} ms")
+    print(f"\tspeedup of the walk: {t_modulo/t_plan:.2f}x")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+'''
+Correctness and runtime comparison of simulations with schedules with and without sharing of identical
+segments between retrofits (user config key "share_schedule_segments", see SegmentCache).
+
+A small scenario tree of schedules is simulated once per schedule without sharing (reference) and once with sharing,
+the results of every schedule have to be identical.
+
+Run from the repository root:
+    python -m benchmarks.compare_schedule_segments
+'''
+import os
+import sys
+import copy
+import time
+import shutil
+import numpy as np
+from src.utils.config import Config
+from src.variator import Variator
+from src.simulations.simulation_controller import SimulationController
+from src.utils.segment_cache import get_segment_report
+
+#======================
+#start of benchmark config section
+#======================
+benchmark_config={
+    "config_path":os.path.join("resources","configurations","config_example_singleFamilyHouse.json"),
+    "fmu_name_windows":"Model_v1_interiorWalls_Floor_Roof_Pctrl_windows_openmodelica_v2.fmu",
+    "fmu_name_linux":"Model_v1_interiorWalls_Floor_Roof_Pctrl_linux_openmodelica_v2.fmu",
+    "cache_path":"cache",
+    #scenario tree: all schedules share the first retrofit, the branches share the time series up to their second retrofit
+    "schedules":{
+        "base":{"10d": {"UExt": 0.25}},
+        "windows":{"10d": {"UExt": 0.25}, "20d": {"UWin": 1.0}},
+        "occupancy":{"10d": {"UExt": 0.25}, "20d": {"Occupancy": "Couple_over_65"}}
+    },
+    #overrides of the config
+    "config_overrides":{
+        "stop_time":30*86400
+    }
+}
+#======================
+#end of benchmark config section
+#======================
+
+
+def run_simulation(config: Config, variation: list, schedule: dict):
+    '''
+    Run one simulation with a schedule.
+
+    Returns:
+        tuple: results, output columns, segment stats and runtime in seconds
+    '''
+    t_start = time.perf_counter()
+    worker = SimulationController(worker_id=1, config=config, variation=variation, schedule=copy.deepcopy(schedule))
+    results, out_cols, _ = worker.simulate_fmu()
+    worker.fmu_wrapper.terminate_fmu()
+    return results, out_cols, worker.segment_stats, time.perf_counter() - t_start
+
+
+if __name__ == "__main__":
+    if sys.platform=="win32":   fmu_name=benchmark_config["fmu_name_windows"]
+    else:                       fmu_name=benchmark_config["fmu_name_linux"]
+    fmu_path=os.path.join("resources","FMUs",fmu_name)
+
+    config = Config(benchmark_config["config_path"], fmu_path, "output", benchmark_config["cache_path"])
+    config.config.update(benchmark_config["config_overrides"])
+    config.fmu_cache.extract()
+    variation = Variator(config.get("variations"), config.get("variation_type")).variation_combinations[0]
+
+    runs = dict()
+    for share_schedule_segments in [False, True]:
+        config.share_schedule_segments = share_schedule_segments
+        shutil.rmtree(config.segment_dir, ignore_errors=True)
+        runs[share_schedule_segments] = {schedule_name: run_simulation(config, variation, schedule)
+                                         for schedule_name, schedule in benchmark_config["schedules"].items()}
+    shutil.rmtree(config.segment_dir, ignore_errors=True)
+    config.fmu_cache.cleanup()
+
+    print(f"\nsimulated time: {config.get('stop_time')-config.get('start_time')} s, {len(benchmark_config['schedules'])} schedules")
+    b_identical = True
+    for schedule_name in benchmark_config["schedules"]:
+        results_reference, out_cols_reference, _, runtime_reference = runs[False][schedule_name]
+        results, out_cols, _, runtime = runs[True][schedule_name]
+        #the order of the output columns may differ between the simulations
+        results = results[:, [out_cols.index(c) for c in out_cols_reference]]
+        b_equal = results.shape == results_reference.shape and np.array_equal(results, results_reference)
+        b_identical &= b_equal
+        print(f"\t{schedule_name:10}\tunshared: {runtime_reference:.2f} s\tshared: {runtime:.2f} s\tidentical results: {b_equal}")
+    for share_schedule_segments, schedule_runs in runs.items():
+        print(f"\tshare_schedule_segments={share_schedule_segments}:\ttotal {sum(run[3] for run in schedule_runs.values()):.2f} s"
+              f"\t{get_segment_report([run[2] for run in schedule_runs.values()]) or 'no segments shared'}")
+    if not b_identical:
+        sys.exit("results with shared segments differ from the results without sharing")
@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 from src.utils.config import Config
-from src.utils.exporter import Exporter
+from src.utils.exporter import Exporter, ResultWriter
 from src.variator import Variator
 import sys
 import os
 import time,datetime
 import zipfile
+import copy
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from src.simulations.simulation_controller import SimulationController
 from src.utils.util_functions import setup_paths
+from src.utils.schedule_utils import parse_schedule, get_variation_updates
+from src.utils.fmu_instance_pool import clear_instance_pools
+from src.utils.segment_cache import get_segment_report
+import shutil
 from multiprocessing import cpu_count
 
 #======================
@@ -16,8 +21,13 @@ from multiprocessing import cpu_count
 #======================
 user_config={
     "config_name":"config_example_singleFamilyHouse.json",
-    "schedule_name": None,
+    "schedule_name": None, #path of a schedule or list of paths, every variation is simulated with every schedule
     "output_path":"output",
+    "cache_path":"cache",
+    "reuse_fmu_instances":False, #reset and reuse FMU instances for subsequent simulations of a worker process instead of instantiating them anew (see benchmarks/benchmark_fmu_instance_reuse.py, no measurable gain for the full setup of the example)
+    "share_schedule_segments":False, #simulate identical segments between the retrofits of simulations with schedules once and share their results (see benchmarks/compare_schedule_segments.py)
+    "resource_packs":False, #compile the weather and profile files used in the simulations into binary packs in the cache_path, which all worker processes map into memory instead of parsing the text files (values are read as float64)
+    "result_chunk_size":10000, #number of result rows a worker writes at once to the csv file while simulating, None: results are kept in memory until the simulation ends
     "fmu_name_windows":"Model_v1_interiorWalls_Floor_Roof_Pctrl_windows_openmodelica_v2.fmu",
     "fmu_name_linux":"Model_v1_interiorWalls_Floor_Roof_Pctrl_linux_openmodelica_v2.fmu",
     "multiprocessing":True
@@ -27,7 +37,7 @@ user_config={
 #======================
 
 
-def worker_start(worker_id: int, config: Config, variation: Variator, schedule = None):
+def worker_start(worker_id: int, config: Config, variation: Variator, schedule = None, result_file = None):
     """
     Entry point for a worker thread that executes a simulation.
 
@@ -38,13 +48,15 @@ def worker_start(worker_id: int, config: Config, variation: Variator, schedule =
         worker_id (int): The unique identifier for the worker thread.
         config (Config): Settings for the simulation series.
         variation (Variator): Variation of model parameters for the current simulation to use
+        result_file (str): If passed and config.result_chunk_size is set, the results are written to this csv file while simulating.
 
     Returns:
         tuple: A tuple containing:
-            - rows: The results of the simulation.
+            - results: The results of the simulation (2-D array, one row per output time), None if written to result_file.
             - header: The header information of the simulation results.
             - variation: Variation of model parameters used for the current simulation
             - converted_variation: The processed variation of model parameters used in the simulation.
+            - segment_stats: number of simulated and shared schedule segments (see SimulationController.simulate_segments())
     """
     print(f'Worker {worker_id} starting to work!  ')
     worker = SimulationController(worker_id=worker_id, 
@@ -52,13 +64,16 @@ def worker_start(worker_id: int, config: Config, variation: Variator, schedule =
                     variation=variation,
                     schedule = schedule)
     
-    rows, header, converted_variation = worker.simulate_fmu()
+    result_writer = None
+    if result_file and config.result_chunk_size:
+        result_writer = ResultWriter(result_file, config.get("time_columns_included"), config.result_chunk_size)
+    results, header, converted_variation = worker.simulate_fmu(result_writer=result_writer)
     worker.fmu_wrapper.terminate_fmu()
-    return rows, header, converted_variation, variation
+    return results, header, converted_variation, variation, worker.segment_stats
 
 if __name__ == "__main__":
     time_begin=time.time()
-    config_path, fmu_path, output_path, schedule = setup_paths(user_config)
+    config_path, fmu_path, output_path, schedules = setup_paths(user_config)
     
     last_modification_timestamp=datetime.datetime(
             *zipfile.ZipFile(fmu_path,"r").getinfo("modelDescription.xml").date_time) \
@@ -67,11 +82,17 @@ if __name__ == "__main__":
     print(f"used FMU-File:\t\t'{fmu_path}' \n\t\t\t(last modified: {last_modification_timestamp})")
     print(f"used config-File:\t'{config_path}'")
     print(f"used output directory:\t'{output_path}'")
-    print(f"used schedule:\t{schedule}")
+    for schedule_name, schedule in schedules:
+        print(f"used schedule:\t{schedule_name+': ' if schedule_name else ''}{schedule}")
     print(f"Multiprocessing:\t'{user_config["multiprocessing"]}'")
     print("\n")
 
-    config = Config(config_path, fmu_path, output_path)
+    config = Config(config_path, fmu_path, output_path, user_config["cache_path"], user_config["reuse_fmu_instances"], user_config["result_chunk_size"],
+                    user_config["share_schedule_segments"], user_config["resource_packs"])
+    #extract the FMU and parse its model description once for the whole simulation series, 
+    # all workers instantiate it from the shared unzip directory and load the cached model description
+    config.fmu_cache.extract()
+    config.fmu_cache.get_model_info()
 
     variator = Variator(config.get('variations'), config.get("variation_type"))
 
@@ -82,36 +103,69 @@ if __name__ == "__main__":
     variation_list = variator.variation_combinations
     variated_config_parameters = variator.get_variated_config_parameters()
 
+    #parameter sets of the simulation series: the variations and their scheduled updates (occupancy changes, retrofits)
+    parameter_sets = list(variation_list)
+    for _, schedule in schedules:
+        if schedule:
+            parsed_schedule = parse_schedule(copy.deepcopy(schedule), config.get("start_time"), config.get("stop_time"))
+            for variation in variation_list:
+                parameter_sets += get_variation_updates(variation, parsed_schedule)
+
+    #compile the input profile files of the parameter sets that changed since the last run into packs, 
+    # the workers share their memory-mapped tables
+    config.compile_resource_packs(parameter_sets)
+
+    #compute the time steps of the input profiles once per distinct combination of profile files of the parameter sets
+    config.prepare_input_profiles(parameter_sets)
+
+    #every variation is simulated with every schedule, simulations with the same segments between retrofits share them
+    tasks = [(variation, schedule_name, schedule) for schedule_name, schedule in schedules for variation in variation_list]
+
+    #create the result directories beforehand, so that the workers can write the results while simulating
+    result_dirs = [exporter.make_result_dir(variation, variated_config_parameters, schedule_name) for variation, schedule_name, _ in tasks]
+
     n_workers = cpu_count()
     with ProcessPoolExecutor(max_workers=n_workers) as executor:
-        total_tasks = len(variation_list)
+        total_tasks = len(tasks)
         completed_tasks = 0
+        segment_stats_list = []
         print(f"Total tasks: {total_tasks}. Computing...\n")
         
-        def export_and_printout(): 
+        def export_and_printout(result_dir): 
             global completed_tasks 
             completed_tasks+= 1   
-            exporter.export_csv(rows=rows, 
+            exporter.export_csv(results=results, 
                                 header=header, 
                                 header_time_columns=config.config["time_columns_included"],
                                 info=converted_variation, 
                                 param_input_list=original_variation, 
-                                var_param=variated_config_parameters)
+                                var_param=variated_config_parameters,
+                                save_dir=result_dir)
             sys.stdout.write(f"\rTasks completed: {completed_tasks}/{total_tasks}, total runtime: {round(time.time()-time_begin,2)} s\n")
             sys.stdout.flush()
 
         # Loop through the completed futures as they finish
         if user_config["multiprocessing"]: 
-            futures = [executor.submit(worker_start, i+1, config, variation, schedule) for i, variation in enumerate(variation_list)]
+            futures = {executor.submit(worker_start, i+1, config, variation, schedule, Exporter.get_result_file(result_dir)): result_dir 
+                       for i, ((variation, _, schedule), result_dir) in enumerate(zip(tasks, result_dirs))}
             for future in as_completed(futures):
-                rows, header, converted_variation, original_variation = future.result()
-                export_and_printout()
+                results, header, converted_variation, original_variation, segment_stats = future.result()
+                segment_stats_list.append(segment_stats)
+                export_and_printout(futures[future])
         else: 
-            for variation in variation_list:
-                rows, header, converted_variation, original_variation = worker_start(1,config,variation, schedule)
-                export_and_printout()
+            for (variation, _, schedule), result_dir in zip(tasks, result_dirs):
+                results, header, converted_variation, original_variation, segment_stats = worker_start(1,config,variation, schedule, Exporter.get_result_file(result_dir))
+                segment_stats_list.append(segment_stats)
+                export_and_printout(result_dir)
         
-        print(f"\nAll tasks are done!\n\n")
+        print(f"\nAll tasks are done!\n")
+        segment_report = get_segment_report(segment_stats_list)
+        if segment_report: print(segment_report)
+        print("\n")
+
+    clear_instance_pools()
+    config.fmu_cache.cleanup()
+    shutil.rmtree(config.segment_dir, ignore_errors=True)
         
     #print("-----------evaulation-----------")
     #import plausibility_check_test
@@ -1,5 +1,6 @@
 from abc import ABC
 import bisect
+import numpy as np
 
 
 class Controller(ABC):
@@ -8,7 +9,20 @@ class Controller(ABC):
     as well as fundamental functions for all controller classes. 
 
     Note: It does not provide a working control function; this must be implemented in a custom controller class.
+
+    There are two interfaces for the control function:
+        - control(): receives and returns a dict of the FMU state (name -> value)
+        - control_array(): receives a vector of the values of get_control_variables() and writes its outputs into 
+            a vector aligned with parameters_u, without building dicts in every control step. 
+            Controllers implementing it set b_array_interface to True.
+            Subclasses overriding only control() fall back to it (see uses_array_interface()).
     '''
+    #True, if the controller implements control_array(), that is used by the ControllerWrapper instead of control() 
+    # (as long as control() isn't overridden below the implementation of control_array())
+    b_array_interface = False
+    #own time interval for control actions in seconds, None: controller_step_size of the config 
+    # (superseded by the config key "controller_step_sizes")
+    step_size = None
     def __init__(self,parameters_y="thermalZone.TAir",parameters_u="ctrSignalHeating",parameters_etc=[],w=20,u_min=0,u_max=1):         
         self.parameters_y=parameters_y
         self.parameters_u=parameters_u
@@ -31,6 +45,8 @@ class Controller(ABC):
         self.w=self.resolve_link_to_fmu_variable(fmu_state_dict=fmu_state_dict,variable=self.w)
         self.u_max=self.resolve_link_to_fmu_variable(fmu_state_dict=fmu_state_dict,variable=self.u_max)
         self.u_min=self.resolve_link_to_fmu_variable(fmu_state_dict=fmu_state_dict,variable=self.u_min)
+        #compile a scheduled setpoint once for the lookups in every control step
+        self.compile_w()
     
 
     def control(self, fmu_state_dict: dict, curr_time: int) -> dict:
@@ -46,8 +62,35 @@ class Controller(ABC):
         '''
 
         return NotImplementedError("Function control not implemented in this controller. Please override this method first.")
+
+    def control_array(self, inputs, outputs, curr_time: int):
+        '''
+        Control function of the array interface (to override, if b_array_interface is True).
+
+        Args:
+            - inputs [np.ndarray]: values of the variables of get_control_variables() in that order (read-only)
+            - outputs [np.ndarray]: preallocated vector aligned with parameters_u, containing the current values of the outputs.
+                    The controller writes its outputs into it in place, unchanged values are written unchanged.
+            - curr_time [int]: Integer representing the current simulation time in seconds
+
+        Returns: None
+        '''
+        raise NotImplementedError("Function control_array not implemented in this controller. Please override this method or set b_array_interface to False.")
     
 
+    def uses_array_interface(self):
+        '''
+        Check if the ControllerWrapper calls control_array() instead of control(): b_array_interface is set and 
+        control_array() is implemented in the class implementing control() or in a subclass of it. 
+        Subclasses overriding only control() (e.g. of TwoPointController_heating) therefore fall back to control().
+        '''
+        if not self.b_array_interface:
+            return False
+        mro = type(self).__mro__
+        control_class = next(c for c in mro if "control" in c.__dict__)
+        control_array_class = next(c for c in mro if "control_array" in c.__dict__)
+        return issubclass(control_array_class, control_class)
+
     def get_control_variables(self):
          '''
          Function to get all the (control) variables the controller needs in its control function to work properly.
@@ -60,12 +103,25 @@ class Controller(ABC):
          '''
          return self.parameters_y, *self.parameters_u, *self.parameters_etc
     
+    def compile_w(self):
+        """
+        Compile a scheduled setpoint w (dict second of day -> value, the value applies after its second of day) 
+        into the sorted switching times and their values. Called by configure(); call it again, if w is changed afterwards.
+        """
+        if type(self.w) is dict:
+            self.w_times=sorted(self.w.keys())
+            self.w_values=[self.w[t] for t in self.w_times]
+        else:
+            self.w_times=None
+            self.w_values=None
+        self.w_compiled=self.w
+
     def get_current_w(self,curr_time):
         """
         Get the current value for w.
 
         If w is a dictionary (indicating a scheduled value), the method retrieves
-        the value corresponding to the current second of the day.
+        the value corresponding to the current second of the day from the compiled schedule (see compile_w()).
 
         Parameters:
         curr_time (int): The current time in seconds.
@@ -74,15 +130,31 @@ class Controller(ABC):
         float: The current value of w.
         """            
         if type(self.w) is dict: 
-            second_of_day=curr_time%86400
-            w_dict=self.w
-            w_dict_keys_list=list(w_dict.keys())
-            w_dict_keys_list.sort()
-            w=w_dict[w_dict_keys_list[bisect.bisect_left(w_dict_keys_list,second_of_day)-1]]
+            if getattr(self,"w_compiled",None) is not self.w:
+                self.compile_w()
+            w=self.w_values[bisect.bisect_left(self.w_times,curr_time%86400)-1]
         else:
             w=self.w
         return w
 
+    def get_w_trace(self,times):
+        """
+        Get the values of w for many times at once (e.g. the setpoint trace of a whole simulation).
+
+        Parameters:
+        times (array-like): The times in seconds.
+
+        Returns:
+        np.ndarray: The values of w at the times, same result as get_current_w() for every time.
+        """
+        times=np.asarray(times)
+        if type(self.w) is dict:
+            if getattr(self,"w_compiled",None) is not self.w:
+                self.compile_w()
+            #index -1 (before the first switching time) wraps around to the last value of the previous day, as in get_current_w()
+            return np.asarray(self.w_values)[np.searchsorted(self.w_times,times%86400,side="left")-1]
+        return np.full(times.shape,self.w,dtype=float)
+
     def resolve_link_to_fmu_variable(self,fmu_state_dict,variable):
         """
         Resolve a variable name to its value in the FMU state dictionary.
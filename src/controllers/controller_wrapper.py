@@ -1,4 +1,5 @@
 from typing import List
+import numpy as np
 from src.fmuwrapper import FMUWrapper
 from src.utils.util_functions import get_controller_by_string
 
@@ -16,8 +17,16 @@ class ControllerWrapper:
     def __init__(self, 
                  controller_names: List[str],
                  controller_step_size: int,
-                 fmu_wrapper: FMUWrapper):
-
+                 fmu_wrapper: FMUWrapper,
+                 controller_step_sizes: dict = None):
+        '''
+        Args:
+            - controller_names: names of the controllers to instantiate
+            - controller_step_size: the time interval for control actions of the controllers without an own step size
+            - fmu_wrapper: the FMUWrapper of the simulation
+            - controller_step_sizes: own time intervals for control actions of single controllers (controller name -> step size), 
+                    superseding the step size declared by the controller class (Controller.step_size)
+        '''
 
         #%%instantiation of controllers
         self.controllers=list()
@@ -27,15 +36,22 @@ class ControllerWrapper:
             # if model internal heating controller should be used, don't add external heating controllers to list. 
             # criterion to be an external heating controller: output is 'ctrSignalHeating' (heating controller interface of fmu)
             if not(b_internal_heating_controller_active and "ctrSignalHeating" in controller.parameters_u):
+                if controller_step_sizes and controller_name in controller_step_sizes:
+                    controller.step_size = int(controller_step_sizes[controller_name])
                 self.controllers.append(controller)
         
         #%%
         #if no controller is going to be applied, set controller_step_size to None 
         # to avoid controller steps in simulation
         self.controller_step_size = controller_step_size if any(self.controllers) else None
+        #time interval for control actions of every controller (multi-rate control, if they differ, see StepPlan)
+        self.controller_step_sizes = [controller.step_size or controller_step_size for controller in self.controllers]
 
         self.fmu_wrapper = fmu_wrapper
 
+        #precompiled control actions of the control groups (see compile_control_plan())
+        self.control_plans = dict()
+
     def configure_controllers(self):
         '''
         Configure external controller instances for the current simulation series.
@@ -65,29 +81,139 @@ class ControllerWrapper:
         else:
             return False
 
-    def get_variables_to_read(self):
+    def get_variables_to_read(self, controller_indices=None):
         '''
         Retrieve all variables from the model needed for calculating control outputs.
 
         This method collects and returns a list of variables required by the 
         external controllers to compute their respective control outputs.
+
+        Args:
+            - controller_indices: indices of the controllers to consider (e.g. the controllers due at a halting point), None: all controllers
         '''        
         variables_to_read = []
-        for controller in self.controllers:   
+        for controller in self.get_controllers(controller_indices):   
             variables_to_read+=controller.get_control_variables() # Read all the controller variables when controller step is needed.
         return variables_to_read
 
-    def handle_control_action(self, curr_time, fmu_state_dict):
+    def get_variables_to_write(self, controller_indices=None):
+        '''
+        Retrieve all variables of the model that can be written by the control actions (the outputs of all external controllers).
+
+        Args:
+            - controller_indices: see get_variables_to_read()
+        '''
+        variables_to_write = []
+        for controller in self.get_controllers(controller_indices):
+            variables_to_write+=controller.parameters_u
+        return variables_to_write
+
+    def get_controllers(self, controller_indices=None):
+        '''
+        Get the controllers with the given indices (all controllers, if controller_indices is None).
+        '''
+        if controller_indices is None:
+            return self.controllers
+        return [self.controllers[i] for i in controller_indices]
+
+    def compile_control_plan(self, read_plan, group=0, controller_indices=None):
+        '''
+        Compile the ControlPlan of a control group, that is used by handle_control_action() for the control actions of the group.
+
+        Args:
+            - read_plan: FMUReadPlan of the control variables of the controllers of the group (see get_variables_to_read()). 
+                    handle_control_action() also accepts plans starting with these variables (e.g. control and output variables), 
+                    as the positions are the same.
+            - group: control group (see StepPlan.control_groups), 0: all controllers
+            - controller_indices: indices of the controllers of the group, None: all controllers
         '''
-        Handle control action(s) by iterating through the external controllers in use, 
+        self.control_plans[group] = ControlPlan(self, read_plan, controller_indices)
+
+    def handle_control_action(self, curr_time, read_plan, group=0):
+        '''
+        Handle control action(s) by iterating through the external controllers in use (of the control group), 
         calculating the control output(s) for each controller based on 
-        the current FMU state and applies the outputs to the model.
+        the current FMU state and applies the outputs of all controllers to the model in one batched call.
+
+        Controllers with the array interface receive a vector of their input values and write their outputs into a vector,
+        the other controllers receive and return a dict of the FMU state (see Controller.control()).
+        Outputs of a controller are visible to the following controllers, if the same variable is written by 
+        several controllers, the output of the last one is applied.
+
+        Args:
+            - curr_time: current simulation time in seconds
+            - read_plan: FMUReadPlan that was just read, starting with the control variables of the group (see compile_control_plan())
+            - group: control group of the halting point (see StepPlan.control_groups), 0: all controllers
         '''
-        for controller in self.controllers: 
-            fmu_state_dict_modified = controller.control(fmu_state_dict=fmu_state_dict, curr_time=curr_time)
-            #limit the controller outputs to the intersection of configured controller output variables and 
-            # actually returned variables by the controller
-            controller_output_keys=set(fmu_state_dict_modified) & set(controller.parameters_u) 
-            #multiple output controller
-            controller_output={key:fmu_state_dict_modified[key] for key in controller_output_keys}  
-            self.fmu_wrapper.alter_in_fmu(controller_output)
\ No newline at end of file
+        control_plan = self.control_plans[group]
+        write_plan = control_plan.write_plan
+        control_values = control_plan.control_values
+        control_values[:] = read_plan.values[:control_plan.n_control_values]
+        #variables not returned by any controller keep their current values
+        write_plan.values[:] = control_values[control_plan.write_read_positions]
+        fmu_state_dict = read_plan.as_dict() if control_plan.b_dict_interface_used else None
+        if write_plan.string_names:
+            write_plan.strings = {name: value.decode() if isinstance(value, bytes) else value 
+                                  for name, value in read_plan.strings.items() if name in write_plan.string_name_set}
+
+        for i, b_array_interface, input_positions, output_positions, output_read_positions, inputs, outputs in control_plan.controllers: 
+            controller = self.controllers[i]
+            if b_array_interface:
+                np.take(control_values, input_positions, out=inputs)
+                np.take(write_plan.values, output_positions, out=outputs)
+                controller.control_array(inputs=inputs, outputs=outputs, curr_time=curr_time)
+                write_plan.values[output_positions] = outputs
+                control_values[output_read_positions] = outputs
+                if fmu_state_dict is not None:
+                    fmu_state_dict.update(zip(controller.parameters_u, outputs.tolist()))
+            else:
+                fmu_state_dict_modified = controller.control(fmu_state_dict=fmu_state_dict, curr_time=curr_time)
+                #limit the controller outputs to the intersection of configured controller output variables and 
+                # actually returned variables by the controller
+                controller_output={key:fmu_state_dict_modified[key] for key in controller.parameters_u if key in fmu_state_dict_modified}
+                write_plan.set_values(controller_output)
+                for key, value in controller_output.items():
+                    if key not in write_plan.string_name_set:
+                        control_values[control_plan.read_index[key]] = value
+
+        write_plan.write()
+
+
+class ControlPlan:
+    '''
+    Precompiled control action of a group of controllers (all controllers or the controllers due at a halting point, 
+    see StepPlan.control_groups), used by ControllerWrapper.handle_control_action().
+
+    Contains the positions of the inputs and outputs of every controller of the group in the value buffers of the read plan 
+    and of the write plan of the group, the preallocated input and output vectors of the controllers with the array interface 
+    (see Controller.control_array()) and the write plan for the outputs of the group.
+    The controllers are referenced by their index in ControllerWrapper.controllers.
+
+    Parameters:
+        controller_wrapper: the ControllerWrapper
+        read_plan: FMUReadPlan of the control variables of the group (see ControllerWrapper.compile_control_plan())
+        controller_indices: indices of the controllers of the group, None: all controllers
+    '''
+    def __init__(self, controller_wrapper, read_plan, controller_indices=None):
+        if controller_indices is None:
+            controller_indices = range(len(controller_wrapper.controllers))
+        controllers = controller_wrapper.get_controllers(controller_indices)
+
+        #plan to write the outputs of the controllers of the group to the FMU in one batched call
+        self.write_plan = controller_wrapper.fmu_wrapper.compile_write_plan(controller_wrapper.get_variables_to_write(controller_indices))
+
+        self.n_control_values = len(read_plan)
+        #working copy of the control values, updated with the outputs of the controllers for the following controllers
+        self.control_values = np.zeros(self.n_control_values, dtype=np.float64)
+        self.read_index = read_plan.index
+        self.write_read_positions = read_plan.get_positions(self.write_plan.names)
+        #per controller: (index, True if it uses the array interface (see Controller.uses_array_interface()), positions of the inputs in the control values, 
+        # positions of the outputs in the write plan, positions of the outputs in the control values, input vector, output vector)
+        self.controllers = []
+        for i, controller in zip(controller_indices, controllers):
+            input_positions = read_plan.get_positions(controller.get_control_variables())
+            output_positions = self.write_plan.get_positions(controller.parameters_u)
+            self.controllers.append((i, controller.uses_array_interface(), input_positions, output_positions, read_plan.get_positions(controller.parameters_u),
+                                     np.zeros(len(input_positions), dtype=np.float64), np.zeros(len(output_positions), dtype=np.float64)))
+        #the dict of the FMU state is only built, if a controller uses the dict interface
+        self.b_dict_interface_used = any(not controller.uses_array_interface() for controller in controllers)
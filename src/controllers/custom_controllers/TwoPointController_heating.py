@@ -12,7 +12,11 @@ class TwoPointController_heating(Controller):
     
     The hysteresis parameter defines the range within which the controller will not 
     switch states to prevent rapid cycling.
+
+    Implements the array interface of the controllers (control_array()), control() is kept for direct use.
     '''
+    b_array_interface = True
+
     def __init__(self,
                 parameters_y="thermalZone.TAir",
                 parameters_u=["ctrSignalHeating"],
@@ -59,3 +63,21 @@ class TwoPointController_heating(Controller):
         
         return(fmu_state_dict)
 
+    #called before every step of simulation by the ControllerWrapper (array interface)
+    def control_array(self,inputs,outputs,curr_time):
+
+        #get possibly scheduled setpoint w
+        w=self.get_current_w(curr_time)
+
+        #value of control variable y (first control variable)
+        y=inputs[0]
+
+        #calculate error, also in case of reversed action control
+        e=(w-y) *(1 if not(self.b_reversed_action_control) else -1)
+
+        #calculate controller output, don't change u within the hysteresis
+        if (e+self.hysteresis)<0: 
+            outputs[0]=self.u_min #lower limit u to u_min
+        elif (e-self.hysteresis)>0:  
+            outputs[0]=self.u_max #limit u to u_max
+
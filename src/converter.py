@@ -1,4 +1,22 @@
+import copy
+from collections import ChainMap, OrderedDict
 from src.utils.util_functions import get_converter_function_by_string
+from src.converter_functions.converter_function import ParameterView
+
+#number of results memoized per converter function and process (see Converter.run_converter_function())
+CONVERTER_MEMO_SIZE = 128
+
+#memoized results of the converter functions with declared inputs: class name -> OrderedDict(input values -> produced parameters)
+converter_function_memos = dict()
+
+#converter function orders that were already reported as invalid (see Converter.validate_order())
+reported_orders = set()
+
+#converter functions that were already reported as skipped (see Converter.get_used_converter_functions())
+reported_skips = set()
+
+#placeholder for declared inputs, that aren't parameters
+MISSING = object()
 
 class Converter():
 
@@ -32,6 +50,93 @@ class Converter():
 
         self.conversion_result_last_dict=self.fmu_default_dict
 
+        #dependency graph of the converter functions by their declared inputs and outputs
+        self.dependencies = self.get_dependencies()
+        self.validate_order()
+        self.converter_functions = self.get_used_converter_functions()
+
+    def get_dependencies(self):
+        '''
+        Builds the dependency graph (DAG) of the converter functions: a converter function depends on the preceding 
+        converter functions, whose outputs it may read (undeclared inputs or outputs, see ConverterFunction, match all parameters).
+
+        Returns: list with the indices of the converter functions every converter function depends on.
+        '''
+        dependencies = []
+        for i, converter_function in enumerate(self.converter_functions):
+            dependencies.append([j for j, preceding_function in enumerate(self.converter_functions[:i])
+                                 if converter_function.inputs is None or preceding_function.outputs is None or
+                                 not set(converter_function.inputs).isdisjoint(preceding_function.outputs)])
+        return dependencies
+
+    def validate_order(self):
+        '''
+        Checks that no converter function reads declared outputs of a subsequent converter function, 
+        i.e. it would read the value before the conversion. Invalid orders are reported once per process.
+        '''
+        for i, converter_function in enumerate(self.converter_functions):
+            if converter_function.inputs is None:
+                continue
+            for subsequent_function in self.converter_functions[i+1:]:
+                if subsequent_function.outputs is None:
+                    continue
+                early_inputs = sorted(set(converter_function.inputs).intersection(subsequent_function.outputs))
+                order = (type(converter_function).__name__, type(subsequent_function).__name__)
+                if early_inputs and order not in reported_orders:
+                    reported_orders.add(order)
+                    print(f"#converter function {order[0]} reads {early_inputs} before they are produced by the subsequent converter function {order[1]} - check the order of \"converter_functions\"")
+
+    def get_used_converter_functions(self):
+        '''
+        Gets the converter functions whose outputs are used: converter functions producing fmu parameters (or undeclared outputs)
+        and the converter functions they depend on (see get_dependencies()). The others are skipped, which is reported once per process.
+
+        Returns: list of the used converter functions in their order.
+        '''
+        used = set()
+        for i in reversed(range(len(self.converter_functions))):
+            outputs = self.converter_functions[i].outputs
+            if i in used or outputs is None or any(k in self.fmu_default_dict for k in outputs):
+                used.add(i)
+                used.update(self.dependencies[i])
+        for i, converter_function in enumerate(self.converter_functions):
+            name = type(converter_function).__name__
+            if i not in used and name not in reported_skips:
+                reported_skips.add(name)
+                print(f"#converter function {name} is skipped: its outputs {converter_function.outputs} are neither fmu parameters nor read by a subsequent converter function")
+        return [converter_function for i, converter_function in enumerate(self.converter_functions) if i in used]
+
+    @staticmethod
+    def run_converter_function(converter_function, convert_dict):
+        '''
+        Runs a converter function. The results of converter functions with declared inputs are memoized per process 
+        by the values of their inputs, e.g. for retrofits or variations that don't change their inputs, the function isn't run again.
+        The memoized results are copied, so that changes of mutable values (e.g. lists) by the caller don't alter the memo.
+
+        Args:
+            - converter_function: the ConverterFunction
+            - convert_dict: ParameterView of the parameters (see convert())
+
+        Returns: dict of the parameters produced by the converter function.
+        '''
+        if converter_function.inputs is None:
+            return converter_function.convert(convert_dict)
+
+        key = freeze([convert_dict.get(k, MISSING) for k in converter_function.inputs])
+        try:
+            hash(key)
+        except TypeError:
+            return converter_function.convert(convert_dict)
+
+        memo = converter_function_memos.setdefault(type(converter_function).__name__, OrderedDict())
+        if key in memo:
+            memo.move_to_end(key)
+        else:
+            memo[key] = copy.deepcopy(dict(converter_function.convert(convert_dict)))
+            if len(memo) > CONVERTER_MEMO_SIZE:
+                memo.popitem(last=False)
+        return copy.deepcopy(memo[key])
+
     def convert(self, variations):
         '''
         Function to convert the variations (in-place).
@@ -49,25 +154,38 @@ class Converter():
 
         for converter_function in self.converter_functions:
 
-
-            convert_dict = {}
-
             #%%include all variables defined as fmu parameters and config parameters in the converter function variables
             #default: fmu-parameter values --> superseded by config-parameter values (possibly) --> superseded by Converter-Function output (possibly)
-            convert_dict.update(self.fmu_default_dict)
-            convert_dict.update(variation_dict)
-            convert_dict.update(conversion_result_dict)
+            #the layers are not copied, the converter function only returns the parameters it produced
+            convert_dict = ParameterView({}, conversion_result_dict, variation_dict, self.fmu_default_dict)
 
-            conversion_result_dict.update(converter_function.convert(convert_dict))
+            conversion_result_dict.update(self.run_converter_function(converter_function, convert_dict))
 
+        variation_keys = list(variation_dict.keys())
         variation_dict.update(conversion_result_dict)
         
         #%%filter: keep only...
         #...parameters that exist as fmu parameters
         ##debug print: difference-set of converter function output and fmu parameters to check, if there are naming errors:
         #print(variation_dict.keys() ^ self.fmu_default_dict.keys())
-        fmu_parameters_to_update_lists=[(k,v) for k,v in variation_dict.items() if k in self.fmu_default_dict.keys() and v!=self.conversion_result_last_dict[k]]
-                                                                                                                        #^^^ why?
-        self.conversion_result_last_dict=conversion_result_dict
+        #...parameters that changed, only the variation and the produced parameters can differ from the last result
+        def is_changed(k):
+            return k in self.fmu_default_dict and variation_dict[k]!=self.conversion_result_last_dict[k]
+        produced_keys = {k for k in conversion_result_dict.keys() - set(variation_keys) if is_changed(k)}
+        #parameters of the variation first, then the produced parameters in the order of the fmu parameters
+        fmu_parameters_to_update_lists=[(k,variation_dict[k]) for k in variation_keys if is_changed(k)] + \
+            [(k,variation_dict[k]) for k in self.fmu_default_dict if k in produced_keys]
+        self.conversion_result_last_dict=ChainMap(variation_dict, self.fmu_default_dict)
         return fmu_parameters_to_update_lists
 
+
+def freeze(value):
+    '''
+    Converts a parameter value to a hashable value (lists to tuples, dicts to tuples of their items). 
+    The types are kept, so that e.g. 1 and 1.0 are different values.
+    '''
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(freeze(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, tuple((k, freeze(v)) for k, v in value.items()))
+    return (type(value), value)
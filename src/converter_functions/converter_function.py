@@ -1,7 +1,35 @@
 from abc import ABC
+from collections import ChainMap
 import pandas as pd
 
+
+class ParameterView(ChainMap):
+    '''
+    Layered, copy-on-write view of the parameters passed to ConverterFunction.convert(), see Converter.convert().
+
+    Reads fall through the layers: parameters produced by the converter function itself, results of the previous
+    converter functions, variation, FMU default values. Writes only go to the top layer (see changes), the other
+    layers aren't copied or modified.
+    '''
+    @property
+    def changes(self):
+        '''
+        dict of the parameters written to the view (the top layer).
+        '''
+        return self.maps[0]
+
 class ConverterFunction(ABC):
+    '''
+    Abstract base class of the converter functions, see Converter.
+
+    Class attributes:
+        - inputs: names of the parameters the converter function reads, None: any parameter (e.g. if it iterates over all parameters).
+                The results of converter functions with declared inputs are reused for the same input values (see Converter.run_converter_function()),
+                so all parameters read by convert() have to be declared.
+        - outputs: names of the parameters the converter function produces, None: any parameter
+    '''
+    inputs = None
+    outputs = None
 
     def __init__(self):
 
@@ -17,6 +45,12 @@ class ConverterFunction(ABC):
         The function to convert a dict of fmu parameter / variations into a new set of variations.
 
         This function must be implemented in every class that extends this ABC.
+
+        Args:
+            - variable_dict: ParameterView of all parameters, parameters can be written to it
+
+        Returns:
+            dict of the parameters produced by the converter function, e.g. variable_dict.changes
         '''
 
         return NotImplementedError("Function convert not implemented in this ConverterFunction. Please override this method first.")
@@ -115,5 +115,5 @@ class Component_configurator(ConverterFunction):
                     # in profile, except parameter is starting with '#'
                     if not(key.startswith("#")):
                         raise IndexError(f"""Could not read out value for parameter '{key}' on component profile '{tr[key]}'. There is none configured.""")        
-        return tr
+        return tr.changes
 
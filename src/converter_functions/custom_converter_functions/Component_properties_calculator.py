@@ -7,6 +7,17 @@ class Component_properties_calculator(ConverterFunction):
     Calculate: the R- and C-Value distributions for the RC-Elements in the components (e.g. wall, floor, roof, internal wall)
     Based on: number of RC-Elements, overall U-Value and heat capacitance of the components, zone dimensions
     '''
+    #parameters read by convert(), the names of the produced parameters depend on the number of RC-elements, see ConverterFunction
+    inputs = [
+        "thermalZone.nExt", "thermalZone.nFloor", "thermalZone.nRoof", "thermalZone.nInt", "UExt", "UFloor", "URoof",
+        "UInt", "UWin", "Rsi_extWall", "Rse_extWall", "Rsi_floor", "Rsi_roof", "Rse_roof", "Rsi_intWall",
+        "Rsi_window", "Rse_window", "extWall_R_distribution", "extWall_C_distribution", "floor_R_distribution",
+        "floor_C_distribution", "roof_R_distribution", "roof_C_distribution", "intWall_R_distribution",
+        "intWall_C_distribution", "heatCapacity_wall", "heatCapacity_floor", "heatCapacity_roof",
+        "heatCapacity_internalWall", "heatCapacity_furniture_per_m2", "wallExt_area_total", "win_area_total",
+        "thermalZone.AFloor", "thermalZone.ARoof", "thermalZone.AInt", "n_floors", "zone_length", "zone_width"
+    ]
+
     def __init__(self):
         super().__init__()
 
@@ -161,7 +172,7 @@ class Component_properties_calculator(ConverterFunction):
         #%%window
         tr["thermalZone.RWin"]=self.calc_R_conductive(self,U=tr["UWin"],Rsi=tr["Rsi_window"],Rse=tr["Rse_window"],A=tr["win_area_total"])
 
-        return tr
+        return tr.changes
 
 
 
@@ -6,6 +6,14 @@ class Miscellaneous_handler(ConverterFunction):
     '''
         Handles everything that does require a separate converter function
     '''
+    #parameters read and produced by convert(), see ConverterFunction
+    inputs = [
+        "UseInternalController", "weaDat.fileName", "UWin"
+    ]
+    outputs = [
+        "UseInternalController.k", "weaDat.filNam", "corGDouPan.UWin"
+    ]
+
     def __init__(self):
         super().__init__()
 
@@ -19,5 +27,5 @@ class Miscellaneous_handler(ConverterFunction):
         # Assign value for U-value radiation correction
         to_return["corGDouPan.UWin"] = to_return["UWin"] 
 
-        return to_return
+        return to_return.changes
 
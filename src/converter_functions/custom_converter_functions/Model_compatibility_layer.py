@@ -41,4 +41,4 @@ class Model_compatibility_layer(ConverterFunction):
                     continue
                 else: raise TypeError("No behaviour defined for type "+str(type(e))+" but parameter "+key+" in list of parameters that should be greater than zero.")
         tr=variable_dict
-        return tr
+        return tr.changes
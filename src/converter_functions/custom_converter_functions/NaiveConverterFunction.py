@@ -10,6 +10,14 @@ class NaiveConverterFunction(ConverterFunction):
     Every custom converter function must implement the ConverterFunction ABC. If not, the concept does not work.
     '''
 
+    #parameters read and produced by convert(), see ConverterFunction
+    inputs = [
+        "A_room_start"
+    ]
+    outputs = [
+        "A_room_start"
+    ]
+
     def __init__(self):
         '''
         Example init function of a custom converter function.
@@ -1,6 +1,6 @@
 import numpy as np
 from src.converter_functions.converter_function import ConverterFunction
-from src.utils.util_functions import load_hygienicalWindowOpening_data,load_internalGain_data,load_weather_data,df_findcol
+from src.utils.design_day_stats import get_weather_stats,get_internalGain_stats
 
 
 
@@ -105,6 +105,20 @@ class Nominal_cooling_power_calculator(ConverterFunction):
 
     '''
 
+    #parameters read and produced by convert(), see ConverterFunction
+    inputs = [
+        "weaDat.fileName", "internalGain.fileName", "thermalZone.AExt[1]", "thermalZone.AExt[2]",
+        "thermalZone.AExt[3]", "thermalZone.AExt[4]", "thermalZone.AWin[1]", "thermalZone.AWin[2]",
+        "thermalZone.AWin[3]", "thermalZone.AWin[4]", "thermalZone.VAir", "thermalZone.AFloor", "thermalZone.ARoof",
+        "thermalZone.AInt", "thermalZone.gWin", "zone_height", "extWall_R_distribution", "heatCapacity_wall",
+        "fATransToAWindow", "fARoofToAFloor", "Rse_extWall", "UExt", "URoof", "UWin", "UFloor", "UInt",
+        "eqAirTemp.aExt", "eqAirTemp.hRad", "eqAirTempVDI.aExt", "eqAirTempVDI.hRad", "TGro.k", "airChangeRate",
+        "heatRecoveryRate"
+    ]
+    outputs = [
+        "coolingPower"
+    ]
+
     def __init__(self):
         super().__init__()
 
@@ -114,7 +128,8 @@ class Nominal_cooling_power_calculator(ConverterFunction):
         # -------------------------------------------------------
         tr = variable_dict
 
-        weather_data = load_weather_data(tr)
+        # design-day statistics of the weather file, computed once per file
+        weather_stats = get_weather_stats(tr)
 
         # External wall areas by orientation (indices 1 to 4)
         AExt_list = [
@@ -195,13 +210,7 @@ class Nominal_cooling_power_calculator(ConverterFunction):
 
         # highest daily mean outdoor temperature from weather data (DIN V 18599-10)
         # (simplification)
-        theta_e_max = (
-            df_findcol(weather_data, "dry bulb temperature")
-            .resample("1d")
-            .mean()
-            .max()
-            .item()
-        ) 
+        theta_e_max = weather_stats["max_daily_mean_temperature"]
 
         delta_theta_source = max(0, theta_e_max - theta_i)
 
@@ -211,13 +220,7 @@ class Nominal_cooling_power_calculator(ConverterFunction):
 
         # maximum hourly mean global horizontal radiation from weather file (DIN V
         # 18599-10) (simplification)
-        I_S_max_global_horizontal = (
-            df_findcol(weather_data, "global horizontal radiation")
-            .resample("1h")
-            .mean()
-            .max()
-            .item()
-        )
+        I_S_max_global_horizontal = weather_stats["max_hourly_global_horizontal_radiation"]
 
         # factor to convert horizontal radiation to vertical (S, E, N, W) in July
         # (own calculation based on DIN 18599-10 Table 9) (simplification)
@@ -377,7 +380,7 @@ class Nominal_cooling_power_calculator(ConverterFunction):
 
         # Use the sum of internal gains from internal gains file 
         # to represent internal gains (simplification)
-        dQ_I_source = load_internalGain_data(tr).resample("1d").mean().max().item()  
+        dQ_I_source = get_internalGain_stats(tr)["max_daily_mean_internal_gains"]
 
         #-------------------------------------------------------
         # Calculate total heat gain
@@ -543,5 +546,5 @@ class Nominal_cooling_power_calculator(ConverterFunction):
         
         tr["coolingPower"] = dQ_c_max.item()
 
-        return tr
+        return tr.changes
         
\ No newline at end of file
@@ -1,5 +1,5 @@
 from src.converter_functions.converter_function import ConverterFunction
-import pandas as pd 
+from src.utils.design_day_stats import get_weather_stats
 
 
 class Nominal_heating_power_calculator(ConverterFunction):
@@ -12,6 +12,16 @@ class Nominal_heating_power_calculator(ConverterFunction):
     It takes into account both the internal and external temperature settings, 
     as well as heat loss due to ventilation and building materials.
     '''
+    #parameters read and produced by convert(), see ConverterFunction
+    inputs = [
+        "ti_set", "roomTempUpperSetpoint", "ta_min", "weaDat.fileName", "heatRecoveryRate", "airChangeRate",
+        "thermalZone.VAir", "UExt", "wallExt_area_total", "UWin", "win_area_total", "UFloor", "thermalZone.AFloor",
+        "URoof", "thermalZone.ARoof"
+    ]
+    outputs = [
+        "heatingPower"
+    ]
+
     def __init__(self):
         super().__init__()
 
@@ -27,7 +37,7 @@ class Nominal_heating_power_calculator(ConverterFunction):
         # behavior, if parameters are explicitly set to null in the config file.
 
         temp_inside=to_return["ti_set"] if to_return["ti_set"]!=None else to_return["roomTempUpperSetpoint"]
-        temp_outside=to_return["ta_min"] if to_return["ta_min"]!=None else float(pd.read_csv(to_return["weaDat.fileName"], sep='\t', decimal='.', skiprows=40).iloc[:,1].min())
+        temp_outside=to_return["ta_min"] if to_return["ta_min"]!=None else float(get_weather_stats(to_return)["min_temperature"])
 
         fk=0.6 # reduction factor against soil fk = 0.6 according to DIN 4108-6
         c_rho_air=0.34 # product of specific heat capacity and density of air in Wh/(m³*K), according to DIN 18599-2
@@ -46,7 +56,7 @@ class Nominal_heating_power_calculator(ConverterFunction):
         # Calculate the element-wise sum of the reciprocals
         to_return["heatingPower"] = (temp_inside-temp_outside) * product
         
-        return to_return
+        return to_return.changes
 
 
 
@@ -76,5 +76,5 @@ class RC_Distribution_Configurator(ConverterFunction):
                     # print(k,tr[k])
                 else:
                     raise KeyError("RC-Distribution-profile '"+profile+"' not found. Available profiles are: "+str(self.RC_distribution_profiles_n3.keys()))
-        return tr
+        return tr.changes
 
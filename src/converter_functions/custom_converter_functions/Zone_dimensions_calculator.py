@@ -10,6 +10,21 @@ class Zone_dimensions_calculator(ConverterFunction):
     Based on:
         - zone length, width and height, number of floor levels, window to wall fraction for each geographical direction
     '''
+    #parameters read and produced by convert(), see ConverterFunction
+    inputs = [
+        "n_floors", "floor_height", "zone_length", "zone_width", "fARoofToAFloor", "fAInt", "fAWin_south",
+        "fAWin_west", "fAWin_north", "fAWin_east", "fATransToAWindow"
+    ]
+    outputs = [
+        "zone_height", "thermalZone.VAir", "thermalZone.AExt[1]", "thermalZone.AExt[2]", "thermalZone.AExt[3]",
+        "thermalZone.AExt[4]", "thermalZone.AWin[1]", "thermalZone.AWin[2]", "thermalZone.AWin[3]",
+        "thermalZone.AWin[4]", "thermalZone.ATransparent[1]", "thermalZone.ATransparent[2]",
+        "thermalZone.ATransparent[3]", "thermalZone.ATransparent[4]", "thermalZone.AFloor", "thermalZone.ARoof",
+        "thermalZone.AInt", "wallExt_area_total", "win_area_total", "envelope_area_total", "eqAirTemp.wfWin[1]",
+        "eqAirTemp.wfWin[2]", "eqAirTemp.wfWin[3]", "eqAirTemp.wfWin[4]", "eqAirTemp.wfWall[1]",
+        "eqAirTemp.wfWall[2]", "eqAirTemp.wfWall[3]", "eqAirTemp.wfWall[4]"
+    ]
+
     def __init__(self):
         super().__init__()
 
@@ -60,7 +75,7 @@ class Zone_dimensions_calculator(ConverterFunction):
         to_return["eqAirTemp.wfWall[4]"] =  to_return["thermalZone.AExt[4]"]  / to_return["wallExt_area_total"]
         
         
-        return to_return
+        return to_return.changes
 
 
 
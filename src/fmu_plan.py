@@ -0,0 +1,177 @@
+import numpy as np
+from fmpy.fmi2 import fmi2ValueReference
+
+
+class FMUVariablePlan:
+    '''
+    Precompiled set of FMU variables for batched access.
+
+    The variables are grouped by FMI type once, when the plan is compiled. For every type group the
+    value references are kept in a preallocated ctypes array together with a reusable value buffer,
+    so that accessing the whole set costs one fmi2Get<Type>/fmi2Set<Type> call per type instead of
+    one call per variable.
+
+    Numeric values are kept in the NumPy array `values`, which is aligned with `names`
+    (use `index` to get the position of a variable). String variables are kept in the dict `strings`.
+
+    Use FMUReadPlan or FMUWritePlan (or FMUWrapper.compile_read_plan/compile_write_plan) instead of this base class.
+    '''
+
+    #FMI type -> (suffix of the fmi2Get/fmi2Set function, numpy dtype of the buffer (matching fmi2Real/fmi2Integer/fmi2Boolean), python type of the values)
+    TYPE_GROUPS = {
+        "Real": ("Real", np.float64, float),
+        "Integer": ("Integer", np.int32, int),
+        "Boolean": ("Boolean", np.int32, int),
+    }
+
+    #FMI types that are accessed through the functions of another type
+    TYPE_ALIASES = {}
+
+    def __init__(self, fmu_wrapper, variables):
+        '''
+        Compile the plan for the given variables.
+
+        Args:
+            - fmu_wrapper: FMUWrapper whose FMU instance is accessed by the plan.
+            - variables: Names of the FMU variables in the plan. Duplicates are ignored.
+        '''
+        self.fmu_wrapper = fmu_wrapper
+        self.names = []
+        self.index = dict()
+        self.strings = dict()
+        self.py_types = []
+
+        group_members = dict()
+        string_members = []
+        for variable in variables:
+            if variable in self.index:
+                continue
+            if variable not in self.fmu_wrapper.vrs:
+                self.handle_unknown_variable(variable)
+                continue
+            fmi_type = self.fmu_wrapper.vrs[variable]["type"]
+            fmi_type = self.TYPE_ALIASES.get(fmi_type, fmi_type)
+            if fmi_type not in self.TYPE_GROUPS and fmi_type != "String":
+                print("unknown type " + fmi_type, "for variable", variable)
+                continue
+            self.index[variable] = len(self.names)
+            self.names.append(variable)
+            if fmi_type == "String":
+                string_members.append(variable)
+                self.py_types.append(None)
+            else:
+                group_members.setdefault(fmi_type, []).append(variable)
+                self.py_types.append(self.TYPE_GROUPS[fmi_type][2])
+
+        self.values = np.zeros(len(self.names), dtype=np.float64)
+
+        #per type group: (function suffix, positions in values, value references, buffer, ctypes view of buffer)
+        self.groups = []
+        for fmi_type, members in group_members.items():
+            suffix, dtype, _ = self.TYPE_GROUPS[fmi_type]
+            positions = np.array([self.index[name] for name in members], dtype=np.intp)
+            vr = (fmi2ValueReference * len(members))(*[self.fmu_wrapper.vrs[name]["reference"] for name in members])
+            buffer = np.zeros(len(members), dtype=dtype)
+            self.groups.append((suffix, positions, vr, buffer, np.ctypeslib.as_ctypes(buffer)))
+
+        self.string_names = string_members
+        self.string_name_set = set(string_members)
+        self.string_vr = [self.fmu_wrapper.vrs[name]["reference"] for name in string_members]
+
+    def handle_unknown_variable(self, variable):
+        '''
+        Called for every variable that is not part of the FMU's variable set.
+        '''
+        raise KeyError(f"Variable '{variable}' doesn't exist in the fmu parameter set")
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, variable):
+        return variable in self.index
+
+    def get_positions(self, variables):
+        '''
+        Get the positions of the given variables in `values`.
+
+        Args:
+            - variables: Names of variables contained in the plan.
+
+        Returns: Integer NumPy array with the positions.
+        '''
+        return np.array([self.index[variable] for variable in variables], dtype=np.intp)
+
+    def as_dict(self):
+        '''
+        Get the current plan values as dict (name -> value), typed like the values returned by fmpy
+        (float for Real, int for Integer and Boolean, bytes for String).
+        '''
+        return {name: self.strings.get(name) if py_type is None else py_type(value)
+                for name, py_type, value in zip(self.names, self.py_types, self.values.tolist())}
+
+
+class FMUReadPlan(FMUVariablePlan):
+    '''
+    Precompiled plan to read a set of FMU variables with one fmi2Get<Type> call per FMI type.
+
+    Variables that don't exist in the FMU are ignored. Enumeration variables are read out as Real.
+    '''
+    TYPE_ALIASES = {"Enumeration": "Real"} #apparently can be read out as float
+
+    def handle_unknown_variable(self, variable):
+        #triggers when a variable should be read out that doesn't exist in the fmu's parameter set
+        print("##ignoring variable", variable, "as it isn't in the fmu parameter set")
+
+    def read(self):
+        '''
+        Read the current values of all plan variables from the FMU.
+
+        Returns: The reused NumPy array `values`, aligned with `names`.
+        '''
+        fmu = self.fmu_wrapper.fmu
+        for suffix, positions, vr, buffer, c_buffer in self.groups:
+            getattr(fmu, "fmi2Get" + suffix)(fmu.component, vr, len(vr), c_buffer)
+            self.values[positions] = buffer
+        if self.string_names:
+            self.strings = dict(zip(self.string_names, fmu.getString(self.string_vr)))
+        return self.values
+
+
+class FMUWritePlan(FMUVariablePlan):
+    '''
+    Precompiled plan to write a set of FMU variables with one fmi2Set<Type> call per FMI type.
+
+    Raises a KeyError on compilation, if a variable doesn't exist in the FMU.
+    '''
+
+    def set_values(self, param_dict):
+        '''
+        Copy values from a dict into the plan buffers. Keys that are not part of the plan are ignored.
+
+        Args:
+            - param_dict: Dict with variable name as key and the value to write.
+        '''
+        for variable, value in param_dict.items():
+            if variable not in self.index:
+                continue
+            if variable in self.string_name_set:
+                self.strings[variable] = value
+            else:
+                self.values[self.index[variable]] = value
+
+    def write(self, param_dict=None):
+        '''
+        Write the values of all plan variables to the FMU.
+
+        Args:
+            - param_dict: Optional dict with new values, that is copied into the plan buffers before writing.
+                    All plan variables are written, thus it should contain every variable of the plan.
+        '''
+        if param_dict is not None:
+            self.set_values(param_dict)
+        fmu = self.fmu_wrapper.fmu
+        for suffix, positions, vr, buffer, c_buffer in self.groups:
+            buffer[:] = self.values[positions]
+            getattr(fmu, "fmi2Set" + suffix)(fmu.component, vr, len(vr), c_buffer)
+        if self.string_names:
+            fmu.setString(self.string_vr, [self.strings.get(name) for name in self.string_names])
@@ -1,48 +1,51 @@
 import os
 import shutil
-from fmpy import read_model_description, extract
+from fmpy import extract
 from fmpy.fmi2 import FMU2Slave
 import pandas as pd
-import json
 import platform
+from src.fmu_plan import FMUReadPlan, FMUWritePlan
+from src.utils.fmu_cache import FMUCache, FMUModelInfo
+from src.utils.fmu_instance_pool import FMUInstancePool
 
 class FMUWrapper:
     def __init__(self,
                  fmu_path: os.path,
-                 start_time
+                 start_time,
+                 fmu_cache: FMUCache = None,
+                 instance_pool: FMUInstancePool = None,
+                 tolerance: float = None
                  ):
+        '''
+        Args:
+            - fmu_path: The path to the fmu.
+            - start_time: The simulation start time.
+            - fmu_cache: FMUCache of the FMU, providing the shared unzip directory and the cached model description.
+                    If None, the model description is parsed and the FMU is extracted into a temporary directory, 
+                    that is removed in terminate_fmu().
+            - instance_pool: FMUInstancePool to take the FMU instance from and return it to in terminate_fmu().
+                    If None, a new FMU instance is created and freed in terminate_fmu().
+            - tolerance: relative tolerance of the FMU solver passed to setupExperiment. If None, the default of the FMU is used.
+        '''
                 
         self.fmu_path = fmu_path
-        self.model_description = read_model_description(self.fmu_path)
-        self.vrs = dict()
-
-        # Get the parameter data from the FMU
-        for variable in self.model_description.modelVariables:
-            self.vrs[variable.name]={"type":variable.type,"reference":variable.valueReference,"start":variable.start}
-
-        #get start values from model description
-        self.fmu_default_dict={k:
-            float(self.vrs[k]["start"]) if self.vrs[k]["type"]=="Real" 
-                and self.vrs[k]["start"]!=None else \
-            str(self.vrs[k]["start"]) if self.vrs[k]["type"]=="String" 
-                and self.vrs[k]["start"]!=None else \
-            int(self.vrs[k]["start"]) if self.vrs[k]["type"]=="Integer" 
-                and self.vrs[k]["start"]!=None  else \
-            bool(self.vrs[k]["start"]) if self.vrs[k]["type"]=="Boolean" 
-                and self.vrs[k]["start"]!=None  else \
-            self.vrs[k]["start"] \
-            for k in self.vrs.keys()}
-
-        ##store start values to a json file (only use, if all start values are available!)
-        #json.dump(self.fmu_default_dict, open("resources/FMUs/fmu_state_dict.json","w"), indent=4, sort_keys=True)
-
-        #fill missing start values with those from json
-        self.fmu_default_dict.update({k:v for k,v in \
-            json.load(open("resources/FMUs/fmu_state_dict.json","r")).items() \
-            if k in self.fmu_default_dict.keys() and self.fmu_default_dict[k]==None})
-        
+        self.fmu_cache = fmu_cache
+        self.instance_pool = instance_pool
+        if self.fmu_cache:
+            self.unzip_dir = self.fmu_cache.extract()
+            self.model_info = self.fmu_cache.get_model_info()
+        else:
+            self.unzip_dir = None
+            self.model_info = FMUModelInfo(self.fmu_path)
+
+        # Get the parameter data from the FMU (shared with the model info, read-only)
+        self.vrs = self.model_info.vrs
+
+        #start values of all model variables (shared with the model info, read-only)
+        self.fmu_default_dict = self.model_info.default_dict
 
         self.time = start_time
+        self.tolerance = tolerance
 
         self.init_FMU()
 
@@ -68,8 +71,6 @@ class FMUWrapper:
         '''
         error_threshold=1e-9
         
-        fmu_variables=read_model_description(self.fmu_path).modelVariables #Extract the FMU variables and attributes from the FMU file to verify if the attributes of a specific variable are appropriate for setting values.
-
         n_errors=0
         fmu_state_dict=self.get_fmu_state_dict(parameters.keys())
         for k in parameters.keys():
@@ -85,9 +86,7 @@ class FMUWrapper:
                 n_errors+=1
             else:
                 #check if fmu parameter attributes are appropriate for values to be set after fmu compilation
-                fmu_variable=[v for v in fmu_variables if v.name==k][0]
-                causality=fmu_variable.__getattribute__("causality")
-                variability=fmu_variable.__getattribute__("variability")
+                causality,variability=self.model_info.get_attributes(k)
                 if causality!="parameter" and (variability=="tunable" or variability=="fixed"):
                     print("##WARNING - INAPROPRIATE ATRIBUTE CAUSALITY: tried to set",k,"to",parameters[k],"actual value is "+str(fmu_value)+", but causality is","\""+causality+"\"","and variability is","\""+variability+"\".","The set parameter value probably wouldn't be used in simulation")
                     n_errors+=1
@@ -100,17 +99,24 @@ class FMUWrapper:
         '''
         Instantiates and initializes the FMU object.
 
-        This method creates an instance of the FMU2Slave using the model's GUID and other parameters, then instantiates the FMU and sets up the experiment starting from the current time.
+        This method creates an instance of the FMU2Slave using the model's GUID and other parameters, then instantiates the FMU and sets up the experiment starting from the current time
+        (with the solver tolerance, if set).
+        If an instance pool is set, a reset instance from the pool is used instead of creating a new one.
 
         '''        
+        if self.instance_pool:
+            self.fmu = self.instance_pool.acquire()
+            self.fmu.setupExperiment(tolerance=self.tolerance, startTime=self.time)
+            return
+
         self.fmu = FMU2Slave(
-            guid=self.model_description.guid,
+            guid=self.model_info.guid,
             unzipDirectory=self.__get_unzip_dir(),
-            modelIdentifier=self.model_description.coSimulation.modelIdentifier,
+            modelIdentifier=self.model_info.model_identifier,
             instanceName='fmu_variations'
         )
         self.fmu.instantiate()
-        self.fmu.setupExperiment(startTime=self.time)
+        self.fmu.setupExperiment(tolerance=self.tolerance, startTime=self.time)
 
 
     def step_FMU(self, step_size):
@@ -137,22 +143,28 @@ class FMUWrapper:
         Returns:
             the directory the fmu writes in.
         '''
-
+        if self.unzip_dir:
+            return self.unzip_dir
         return extract(self.fmu_path)
 
     def terminate_fmu(self):
 
         ''' Function to terminate the FMU and free the space.
+        If an instance pool is set, the FMU instance is returned to the pool instead.
 
         Arguments: none.
 
         Returns: none.
         '''
+        if self.instance_pool:
+            self.instance_pool.release(self.fmu)
+            return
         try:
             self.fmu.terminate()
             if platform.system().lower()=="linux": #currently deactivated on windows as it broke the execution in tests
                 self.fmu.freeInstance() 
-            shutil.rmtree(self.fmu.unzipDirectory)
+            if not self.unzip_dir: #shared unzip directories are removed by their owner (see FMUCache.cleanup())
+                shutil.rmtree(self.fmu.unzipDirectory)
         except Exception as e:
             print("FMU could not be terminated properly. Maybe no simulation was done after init step.")
 
@@ -185,6 +197,28 @@ class FMUWrapper:
         '''        
         self.fmu.reset()
 
+    def compile_read_plan(self, variables_to_read):
+        '''
+        Compile a plan to read a fixed set of FMU variables with one call per FMI type.
+
+        Args:
+            - variables_to_read: The variables that need to be read from the FMU.
+
+        Returns: FMUReadPlan; call its read() method to get the current values into its NumPy buffer `values`.
+        '''
+        return FMUReadPlan(self, variables_to_read)
+
+    def compile_write_plan(self, variables_to_write):
+        '''
+        Compile a plan to write a fixed set of FMU variables with one call per FMI type.
+
+        Args:
+            - variables_to_write: The variables that need to be written to the FMU.
+
+        Returns: FMUWritePlan; fill its NumPy buffer `values` (or pass a dict) and call its write() method.
+        '''
+        return FMUWritePlan(self, variables_to_write)
+
     def alter_in_fmu(self, param_dict):
         '''
         Helper function to alter a set of parameters in the FMU given in a dict.
@@ -194,23 +228,13 @@ class FMUWrapper:
 
         Returns: None
         '''
-
-        for variable, value in param_dict.items():
-            if self.vrs[variable]["type"]=="Real":
-                self.fmu.setReal([self.vrs[variable]["reference"]],[value])
-            elif self.vrs[variable]["type"]=="String":
-                self.fmu.setString([self.vrs[variable]["reference"]],[value])
-            elif self.vrs[variable]["type"]=="Boolean":
-                self.fmu.setBoolean([self.vrs[variable]["reference"]],[value])
-            elif self.vrs[variable]["type"]=="Integer":
-                self.fmu.setInteger([self.vrs[variable]["reference"]],[value])
-            else:
-                print("unknown type "+ self.vrs[variable]["type"],"for variable",variable)
+        self.compile_write_plan(param_dict.keys()).write(param_dict)
     
     
     def get_fmu_state_dict(self, variables_to_read):
         '''
         Helper function to read parameters of the FMU and return it with the respective values in a dict.
+        For repeated reads of the same variables, compile a read plan once with compile_read_plan() instead.
 
         Args: 
             - variables_to_read: The variables that need to be read from the FMU.
@@ -218,30 +242,11 @@ class FMUWrapper:
 
         Returns: Dict with the current FMU state (minimal).
         '''
-        
-        state_dict = dict()
         if type(variables_to_read) is str and variables_to_read.lower()=="all".lower(): 
             variables_to_read=self.vrs.keys()
-        for variable in variables_to_read:
-            try:
-                if self.vrs[variable]["type"]=="Real":
-                    value=self.fmu.getReal([self.vrs[variable]["reference"]])[0]
-                elif self.vrs[variable]["type"]=="String":
-                    value=self.fmu.getString([self.vrs[variable]["reference"]])[0]
-                elif self.vrs[variable]["type"]=="Boolean":
-                    value=self.fmu.getBoolean([self.vrs[variable]["reference"]])[0]
-                elif self.vrs[variable]["type"]=="Integer":
-                    value=self.fmu.getInteger([self.vrs[variable]["reference"]])[0]
-                elif self.vrs[variable]["type"]=="Enumeration": #apparently can be read out as float
-                    value=self.fmu.getReal([self.vrs[variable]["reference"]])[0] #enumeration-variable readout
-                else:
-                    print("unknown type "+ self.vrs[variable]["type"],"for variable",variable)
-                    continue
-                state_dict[variable]=value
-            except(KeyError): #triggers when a variable should be read out that doesn't exist in the fmu's parameter set
-                print("##ignoring variable",variable,"as it isn't in the fmu parameter set")
-                continue
-        return state_dict
+        read_plan = self.compile_read_plan(variables_to_read)
+        read_plan.read()
+        return read_plan.as_dict()
 
     def save_current_fmu_variables(self,file_name:str=None):
         '''
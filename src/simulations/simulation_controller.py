@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 from src.utils.config import Config
 from src.fmuwrapper import FMUWrapper
+from src.utils.fmu_instance_pool import get_instance_pool
+from src.utils.exporter import ResultWriter
+from src.utils.segment_cache import SegmentCache
+from src.utils.resource_packs import set_resource_pack_dir
+from src.utils.design_day_stats import set_design_day_stats_dir
 from src.converter import Converter
 from src.variator import Variator
 from src.controllers.controller_wrapper import ControllerWrapper
-from src.utils.util_functions import get_step_size_arr
-from src.utils.schedule_utils import parse_schedule, schedule_step_size_array, get_index_from_dict_like_array, check_for_invalid_keys
-import copy
+from src.simulations.step_plan import StepPlan, get_step_plan
+from src.utils.schedule_utils import parse_schedule, get_index_from_dict_like_array, check_for_invalid_keys, get_variation_updates
+import numpy as np
 
 class SimulationController:
     '''
@@ -23,6 +28,10 @@ class SimulationController:
         self.id = worker_id
         self.config = config
         self.variation = variation
+        #use the packs and design-day statistics of the input profile files of the simulation series 
+        # (the worker process may not have inherited the settings)
+        set_resource_pack_dir(config.resource_pack_dir)
+        set_design_day_stats_dir(config.design_day_stats_dir)
 
         self.setup_FMU(self.config, self.variation, self.config.get("start_time"))
 
@@ -34,134 +43,270 @@ class SimulationController:
             check_for_invalid_keys(schedule, config.config["variations"])
 
             # parse retrofits into array that correlates with halting points, accumulate retrofits
-            self.variation_updates = [dict(variation)]
-            for index, timestamp in enumerate(schedule):
-
-                # if heatPower was updated last step but should not be updated this time, remove key
-                remove_heater_update = False
-                if "Heater" in self.variation_updates[-1] and not "Heater" in schedule[timestamp]:
-                    remove_heater_update = True
-                self.variation_updates[-1].update(schedule[timestamp])
-                if remove_heater_update:
-                    self.variation_updates[-1].pop("Heater")
-                self.variation_updates.append(copy.deepcopy(self.variation_updates[index]))
-
-
-            self.variation_updates = [list(i.items()) for i in self.variation_updates]
-
-            # if schedule is provided, calculate halting points for retrofits
-            self.step_size_arr, self.start_times = schedule_step_size_array(config.get("start_time"),
-                                                    config.get("stop_time"),
-                                                    config.get("writer_step_size"),
-                                                    self.controller_wrapper.controller_step_size,
-                                                    max_permitted_time_step=config.get_max_permitted_time_step(),
-                                                    schedule = schedule)
-
-        # else if no schedule is provided, compute time steps for simulation
-        else:
-
-            self.step_size_arr = [get_step_size_arr(config.get("start_time"),
-                                                    config.get("stop_time"),
-                                                    config.get("writer_step_size"),
-                                                    self.controller_wrapper.controller_step_size,
-                                                    max_permitted_time_step=config.get_max_permitted_time_step())]
-            self.start_times = [config.get("start_time")]
-
-
-    def generate_output_check(self, curr_time_relative):
+            self.variation_updates = get_variation_updates(variation, schedule)
+
+        # compute halting points with their step sizes and actions (control, output, retrofit) for the simulation,
+        # considering the input profiles of the variation and its retrofits
+        parameter_sets = [variation] + (self.variation_updates if schedule else [])
+        max_permitted_time_step = config.get_max_permitted_time_step(parameter_sets)
+        # the accuracy profile may limit the communication step size further
+        if config.get_accuracy_profile()["max_step_size"]:
+            max_permitted_time_step = min(max_permitted_time_step, config.get_accuracy_profile()["max_step_size"])
+        self.step_plan = get_step_plan(config.get("start_time"),
+                                       config.get("stop_time"),
+                                       config.get("writer_step_size"),
+                                       self.controller_wrapper.controller_step_size,
+                                       max_permitted_time_step=max_permitted_time_step,
+                                       schedule = schedule,
+                                       controller_step_sizes=self.controller_wrapper.controller_step_sizes)
+        # discard the results of the spin-up period (warm-up of the building)
+        if config.get("spin_up_time"):
+            self.step_plan.discard_outputs_before(config.get("start_time") + config.get("spin_up_time"))
+
+        # simulations with a schedule share identical time series (segments) via the segment cache
+        self.segment_cache = SegmentCache(config.segment_dir) if schedule and config.share_schedule_segments else None
+        self.segment_stats = {"simulated": 0, "shared": 0}
+        self.segment_rows = None
+
+
+    def generate_output(self, row_index, curr_time, output_values, output_strings=None):
         '''
-        Determines if output should be generated at the current simulation time.
-        Returns a boolean indicating whether output should be generated based on the elapsed simulation time and the `controller_step_size` parameter from the configuration.
+        Writes a new result row for the current simulation time into the preallocated result array self.results.
+
+        The row contains the current time as first column followed by the values of the output columns (without the timestamp header).
+        If there are non-Real output columns, the values keep the types returned by fmpy (int for Integer and Boolean, 
+        bytes for String), see get_result_dtype().
 
         Parameters:
-            curr_time_relative (float): The simulation time, elapsed since simulation start time
+            row_index (int): The index of the row in self.results.
+            curr_time (float): The current simulation time.
+            output_values (np.ndarray): The current values of the output columns, ordered like self.out_cols[1:].
+            output_strings (dict): The current values of the String variables of the read plan (name -> value).
+        '''    
+        row = self.results[row_index]
+        row[0] = int(curr_time)
+        if self.output_py_types is None:
+            row[1:] = output_values
+        else:
+            row[1:] = [output_strings.get(name) if py_type is None else py_type(value) 
+                       for name, py_type, value in zip(self.out_cols[1:], self.output_py_types, output_values.tolist())]
 
-        Returns:
-            bool: True if output should be generated, False otherwise.
+    def get_result_dtype(self):
         '''
-        if curr_time_relative % self.config.get("writer_step_size") == 0:
-            return True 
-        else:
-            return False
+        Gets the dtype of the result array: float64, if all output columns are Real (or Enumeration, read as Real), 
+        else object, so that Integer, Boolean and String outputs are exported as before (not as floats).
+        '''
+        return np.float64 if self.output_py_types is None else object
 
-    def generate_output(self, curr_time, fmu_state_dict):
+    def setup_read_plans(self):
         '''
-        Generates and returns a new result row for the current simulation time.
+        Compiles the read plans used in the simulation loop for the current FMU wrapper.
 
-        This method creates a list containing the current time as an integer and appends values from the `fmu_state_dict` for each output column, skipping the timestamp header.
+        Depending on whether a control action and/or output generation is performed at a halting point, 
+        one of three plans is used, so that only the needed variables are read with one call per FMI type.
+        The plans are stored in self.read_plans with the StepPlan flags of the halting point as keys (CONTROL, OUTPUT or both).
+        With controllers of different step sizes, the plans of the control actions only contain the variables of the controllers 
+        due, they are compiled on first use for every control group (see compile_read_plan()).
+        '''
+        self.read_plans = dict()
+        self.output_positions = dict()
+        self.reread_plans = dict()
+        for key in (StepPlan.CONTROL, StepPlan.OUTPUT, StepPlan.CONTROL | StepPlan.OUTPUT):
+            self.compile_read_plan(key)
+        #python types of the output columns (None: String), only kept if there are non-Real output columns
+        output_plan = self.read_plans[StepPlan.OUTPUT]
+        self.output_py_types = [output_plan.py_types[output_plan.index[name]] for name in self.out_cols[1:]]
+        if all(py_type is float for py_type in self.output_py_types):
+            self.output_py_types = None
+
+    def compile_read_plan(self, key):
+        '''
+        Compiles the read plan of a combination of actions and control group and stores it in self.read_plans. 
 
-        Parameters:
-            curr_time (float): The current simulation time.
-            fmu_state_dict (dict): A dictionary containing the current state of the FMU variables.
+        Arguments:
+            - key: actions (StepPlan flags CONTROL and/or OUTPUT) | control group (see StepPlan.control_groups) << 2
 
         Returns:
-            list: A list representing the result row for the current simulation time.
-        '''    
-        row = [int(curr_time)]
-        for key in self.out_cols[1:]: # skip the timestamp header
-            row.append(fmu_state_dict[key])
-        return row
-
-    def simulate_fmu(self):
+            FMUReadPlan
+        '''
+        actions, group = key & (StepPlan.CONTROL | StepPlan.OUTPUT), key >> 2
+        controller_indices = self.step_plan.control_groups[group] if group else None
+        control_variables = self.controller_wrapper.get_variables_to_read(controller_indices) if actions & StepPlan.CONTROL else []
+        output_variables = self.out_cols[1:] if actions & StepPlan.OUTPUT else []
+        read_plan = self.fmu_wrapper.compile_read_plan(control_variables + output_variables)
+        self.read_plans[key] = read_plan
+
+        if actions == StepPlan.CONTROL:
+            self.controller_wrapper.compile_control_plan(read_plan, group, controller_indices)
+        #positions of the output columns in the value buffers of the plans containing them
+        if actions & StepPlan.OUTPUT:
+            self.output_positions[key] = read_plan.get_positions(output_variables)
+        if actions == StepPlan.CONTROL | StepPlan.OUTPUT:
+            #the plan of control and output variables starts with the control variables, 
+            # so the positions of the controller inputs and outputs are the same as in the plan of the control variables
+            if key & ~StepPlan.OUTPUT not in self.read_plans:
+                self.compile_read_plan(key & ~StepPlan.OUTPUT)
+            #after a control action, only the output columns that may depend on the controller outputs are read out again
+            # (plan for re-reading and positions of its variables in the plan of control and output variables)
+            reread_variables = self.fmu_wrapper.model_info.get_variables_affected_by_inputs(output_variables, 
+                                                                       self.controller_wrapper.get_variables_to_write(controller_indices))
+            reread_plan = self.fmu_wrapper.compile_read_plan(reread_variables)
+            self.reread_plans[key] = (reread_plan, read_plan.get_positions(reread_plan.names))
+        return read_plan
+
+    def simulate_fmu(self, result_writer: ResultWriter = None):
         '''
         Executes one simulation of the model step by step, handling all model inputs and outputs during the simulation and returning the results.
-        If self.step_size_arr contains multiple timeseries, updates the fmu with the retrofits specified in self.variation_updates.
+        Walks the halting points of self.step_plan. If it contains multiple timeseries, updates the fmu with the retrofits specified in self.variation_updates.
+        If the segment cache is used, time series already simulated by other simulations of the series are taken from it (see simulate_segments()).
 
         Returns:
-            - rows (list): The generated output rows from the simulation.
-            - out_cols (list): The output column headers.
+            - results (np.ndarray): 2-D array with one row per output time, the first column contains the simulation time
+                    (float64, object if there are non-Real output columns, see get_result_dtype()).
+                    None, if the results were written to result_writer.
+            - out_cols (list): The output column headers, the column index of the results.
             - converted_variation: The converted variation data.
 
         Parameters:
-            None
+            result_writer: if passed, the results are written to it in chunks of result_writer.chunk_size rows while simulating, 
+                    so that the memory needed for the results doesn't grow with the simulated time.
         '''
-        rows = []
+        #preallocate the results (one row per output time or one chunk of rows)
+        n_output = self.step_plan.count(StepPlan.OUTPUT)
+        if result_writer is not None and result_writer.chunk_size:
+            n_output = min(n_output, result_writer.chunk_size)
+        self.results = np.empty((n_output, len(self.out_cols)), dtype=self.get_result_dtype())
+        self.n_rows = 0
+        self.n_retrofits = 0
 
         self.fmu_wrapper.save_current_fmu_variables("fmu_initial_state.csv")
 
-        for index, schedule in enumerate(self.step_size_arr):
-
-            #print(schedule)
-            for step_size in schedule:
-                
-                #calculate simulation time since simulation start time
-                curr_time_relative=self.fmu_wrapper.time-self.start_times[index]
-                b_perform_control = self.controller_wrapper.perform_control_check(curr_time_relative=
-                                                                                curr_time_relative)
-                
-                b_generate_output = self.generate_output_check(curr_time_relative=curr_time_relative)
-
-                variables_to_read = []
-                if b_perform_control:
-                    variables_to_read += self.controller_wrapper.get_variables_to_read()
-
-                if b_generate_output:
-                    variables_to_read += self.out_cols[1:]
-
-                fmu_state_dict = self.fmu_wrapper.get_fmu_state_dict(variables_to_read=variables_to_read)
+        if self.segment_cache is not None:
+            self.simulate_segments(result_writer)
+        else:
+            self.simulate_steps(0, len(self.step_plan), result_writer)
 
-                if b_perform_control:
-                    self.controller_wrapper.handle_control_action(curr_time=self.fmu_wrapper.time, 
-                                                                  fmu_state_dict=fmu_state_dict)
+        if result_writer is not None:
+            result_writer.write(self.results[:self.n_rows], self.out_cols)
+            result_writer.close(self.out_cols)
+            return None, self.out_cols, list(self.converted_variation.items())
+        return self.results[:self.n_rows], self.out_cols, list(self.converted_variation.items())
 
-                #read out again variables from fmu to get recent values influenced by controller (e.g. totalHeatingPower.y influenced by controller output ctrSignalHeating) (no doStep is necessary here) 
-                fmu_state_dict = self.fmu_wrapper.get_fmu_state_dict(variables_to_read=variables_to_read)
+    def simulate_segments(self, result_writer: ResultWriter = None):
+        '''
+        Walks the time series (segments) of self.step_plan. Every segment is taken from the SegmentCache, 
+        if it was already simulated by another simulation of the series, else it is simulated and stored in the cache.
+        The use of the cache is recorded in self.segment_stats (see get_segment_report()).
 
-                if b_generate_output:
-                    rows.append(self.generate_output(curr_time=self.fmu_wrapper.time, 
-                                                  fmu_state_dict=fmu_state_dict))
+        Parameters:
+            result_writer: see simulate_fmu()
+        '''
+        segment_bounds = self.step_plan.segment_starts.tolist() + [len(self.step_plan)]
+        for segment, (segment_start, segment_stop) in enumerate(zip(segment_bounds[:-1], segment_bounds[1:])):
+
+            # everything the results of the segment depend on (the converted variation of the previous segments 
+            # contains e.g. the nominal heating power, that is kept at retrofits)
+            segment_key = self.segment_cache.get_key({
+                "parameters": sorted(dict(self.variation if segment == 0 else self.variation_updates[segment-1]).items()),
+                "converted_variation": sorted(self.converted_variation.items()) if segment > 0 else None,
+                "start_time": self.step_plan.start_times[segment],
+                "step_sizes": self.step_plan.step_sizes[segment_start:segment_stop].tolist(),
+                "flags": self.step_plan.flags[segment_start:segment_stop].tolist()
+            })
+            cached = self.segment_cache.load_or_reserve(segment_key)
+            if cached is not None:
+                if segment > 0:
+                    self.n_retrofits += 1
+                self.converted_variation = cached["converted_variation"]
+                #the order of the output columns may differ between processes
+                self.append_rows(cached["results"][:, [cached["out_cols"].index(c) for c in self.out_cols]], result_writer)
+                self.segment_stats["shared"] += 1
+                continue
+
+            try:
+                #record the result rows of the segment, also the ones written to result_writer meanwhile
+                self.segment_rows = []
+                self.segment_row_start = self.n_rows
+                self.simulate_steps(segment_start, segment_stop, result_writer)
+                self.segment_rows.append(self.results[self.segment_row_start:self.n_rows].copy())
+                self.segment_cache.store(segment_key, 
+                                         {"results": np.concatenate(self.segment_rows), 
+                                          "out_cols": self.out_cols, 
+                                          "converted_variation": dict(self.converted_variation)})
+                self.segment_stats["simulated"] += 1
+            finally:
+                self.segment_cache.release(segment_key)
+                self.segment_rows = None
+
+    def append_rows(self, rows, result_writer: ResultWriter = None):
+        '''
+        Appends result rows (e.g. of a segment taken from the segment cache) to self.results, 
+        full chunks are written to result_writer.
+        '''
+        while len(rows):
+            if self.n_rows == len(self.results):
+                result_writer.write(self.results, self.out_cols)
+                self.n_rows = 0
+            n_rows = min(len(rows), len(self.results) - self.n_rows)
+            self.results[self.n_rows:self.n_rows+n_rows] = rows[:n_rows]
+            self.n_rows += n_rows
+            rows = rows[n_rows:]
+
+    def simulate_steps(self, start_index, stop_index, result_writer: ResultWriter = None):
+        '''
+        Walks the halting points of self.step_plan from start_index to stop_index (excluded): performs the retrofits, 
+        control actions and outputs of the halting points and the simulation steps.
 
-                self.fmu_wrapper.step_FMU(step_size=step_size)
+        Parameters:
+            start_index, stop_index: range of halting points
+            result_writer: see simulate_fmu()
+        '''
+        n_rows = self.n_rows
+        n_retrofits = self.n_retrofits
 
+        for step_size, flags, group in self.step_plan.iterate(start_index, stop_index):
 
-            # if another timesieries follows in step_size_array, update parameters according to self.variation_updates
-            if index < len(self.step_size_arr)-1:
-                self.setup_FMU(self.config, self.variation_updates[index], self.start_times[index+1], re_initialization = True)
-            
+            # if a new time series starts, update parameters according to self.variation_updates
+            if flags & StepPlan.RETROFIT:
+                n_retrofits += 1
+                self.setup_FMU(self.config, self.variation_updates[n_retrofits-1], self.step_plan.start_times[n_retrofits], re_initialization = True)
 
+            actions = flags & (StepPlan.CONTROL | StepPlan.OUTPUT)
+            if actions:
+                #the read plan of the actions and the controllers due (control group, only with controllers of different step sizes)
+                key = actions | group << 2
+                read_plan = self.read_plans[key] if key in self.read_plans else self.compile_read_plan(key)
+                read_plan.read()
 
-            
-        return rows, self.out_cols, list(self.converted_variation.items())
+                if actions & StepPlan.CONTROL:
+                    self.controller_wrapper.handle_control_action(curr_time=self.fmu_wrapper.time, 
+                                                                  read_plan=read_plan,
+                                                                  group=group)
+
+                    #read out again output variables from fmu to get recent values influenced by controller (e.g. totalHeatingPower.y influenced by controller output ctrSignalHeating) (no doStep is necessary here) 
+                    if actions & StepPlan.OUTPUT:
+                        reread_plan, reread_positions = self.reread_plans[key]
+                        if len(reread_plan):
+                            read_plan.values[reread_positions] = reread_plan.read()
+
+                if actions & StepPlan.OUTPUT:
+                    #write the full chunk
+                    if n_rows == len(self.results):
+                        if self.segment_rows is not None:
+                            self.segment_rows.append(self.results[self.segment_row_start:].copy())
+                            self.segment_row_start = 0
+                        result_writer.write(self.results, self.out_cols)
+                        n_rows = 0
+                    self.generate_output(row_index=n_rows,
+                                         curr_time=self.fmu_wrapper.time, 
+                                         output_values=read_plan.values[self.output_positions[key]],
+                                         output_strings=read_plan.strings)
+                    n_rows += 1
+
+            self.fmu_wrapper.step_FMU(step_size=step_size)
+
+        self.n_rows = n_rows
+        self.n_retrofits = n_retrofits
 
 
     def setup_FMU(self, config, variation, start_time, re_initialization = False):
@@ -190,8 +335,15 @@ class SimulationController:
 
 
 
+        # if FMU is re-initialized, release the FMU instance of the previous time series
+        if re_initialization:
+            self.fmu_wrapper.terminate_fmu()
+
         self.fmu_wrapper = FMUWrapper(fmu_path=config.fmu_path, 
-                                       start_time=start_time)
+                                       start_time=start_time,
+                                       fmu_cache=config.fmu_cache,
+                                       instance_pool=get_instance_pool(config.fmu_cache) if config.reuse_fmu_instances else None,
+                                       tolerance=config.get_accuracy_profile()["tolerance"])
 
         
         self.out_cols = ["timestamp"] + \
@@ -215,6 +367,9 @@ class SimulationController:
         
         self.controller_wrapper = ControllerWrapper(config.get("controller_name"),
                                             config.get("controller_step_size"),
-                                            self.fmu_wrapper)
+                                            self.fmu_wrapper,
+                                            config.get("controller_step_sizes"))
+
+        self.controller_wrapper.configure_controllers()
 
-        self.controller_wrapper.configure_controllers()
\ No newline at end of file
+        self.setup_read_plans()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import numpy as np
+from src.utils.util_functions import get_step_size_arr, run_length_encode_step_size_arr
+from src.utils.schedule_utils import schedule_step_size_array
+
+
+class StepPlan:
+    '''
+    Precompiled plan of all halting points of a simulation.
+
+    For every halting point (the start of a simulation step) the plan contains the step size to the next
+    halting point and bitflags telling what happens at the halting point before stepping:
+        - CONTROL: a control action is performed (controller_step_size elapsed since start of the time series,
+            with controllers of different step sizes: the step size of at least one controller elapsed)
+        - OUTPUT: a result row is generated (writer_step_size elapsed since start of the time series)
+        - RETROFIT: the FMU is re-initialized with updated parameters (first halting point of every time series but the first)
+
+    The flags are computed once from the step sizes, so that the simulation loop only walks the arrays.
+
+    If the controllers have different step sizes (multi-rate control), the plan also contains the control group of every
+    halting point: a bitmask of the distinct controller step sizes elapsed at the halting point. control_groups maps 
+    every group to the indices of the controllers due. With a common step size for all controllers, the group is 0 
+    (all controllers) at every halting point.
+
+    Parameters:
+        step_size_arrays: list of lists of step sizes, one list per time series (see get_step_size_arr/schedule_step_size_array)
+        start_times: list of start times of the time series
+        writer_step_size: the time interval for writing output
+        controller_step_size: the time interval for control actions, None if no controller is active
+        controller_step_sizes: the time intervals for control actions of every controller, if they may differ (see ControllerWrapper.controller_step_sizes)
+    '''
+    CONTROL = 1
+    OUTPUT = 2
+    RETROFIT = 4
+
+    def __init__(self, step_size_arrays: list, start_times: list, writer_step_size: int, controller_step_size: int, 
+                 controller_step_sizes: list = None):
+        self.start_times = list(start_times)
+        self.writer_step_size = writer_step_size
+        self.controller_step_size = controller_step_size
+        self.controller_step_sizes = controller_step_sizes
+
+        #distinct step sizes of the controllers (bits of the control groups), only if they differ
+        rates = sorted(set(controller_step_sizes)) if controller_step_sizes else []
+        if len(rates) == 1:
+            self.controller_step_size = rates[0]
+            rates = []
+
+        step_sizes = []
+        halting_points = []
+        flags = []
+        groups = []
+        segments = []
+        for index, (schedule, start_time) in enumerate(zip(step_size_arrays, self.start_times)):
+            schedule = np.asarray(schedule, dtype=np.float64)
+            #simulation time since start time of the time series at every halting point
+            curr_times_relative = np.concatenate(([0.0], np.cumsum(schedule)[:-1])) if len(schedule) else np.empty(0)
+
+            segment_flags = np.zeros(len(schedule), dtype=np.uint8)
+            segment_groups = np.zeros(len(schedule), dtype=np.int64)
+            if rates:
+                for bit, rate in enumerate(rates):
+                    segment_groups[curr_times_relative % rate == 0] |= 1 << bit
+                segment_flags[segment_groups != 0] |= self.CONTROL
+            elif self.controller_step_size:
+                segment_flags[curr_times_relative % self.controller_step_size == 0] |= self.CONTROL
+            segment_flags[curr_times_relative % self.writer_step_size == 0] |= self.OUTPUT
+            if index > 0 and len(schedule):
+                segment_flags[0] |= self.RETROFIT
+
+            segments.append(sum(len(s) for s in step_sizes))
+            step_sizes.append(schedule)
+            halting_points.append(start_time + curr_times_relative)
+            flags.append(segment_flags)
+            groups.append(segment_groups)
+
+        self.step_sizes = np.concatenate(step_sizes) if step_sizes else np.empty(0)
+        self.halting_points = np.concatenate(halting_points) if halting_points else np.empty(0)
+        self.flags = np.concatenate(flags) if flags else np.empty(0, dtype=np.uint8)
+        self.groups = np.concatenate(groups) if groups else np.empty(0, dtype=np.int64)
+        #indices of the controllers due in every control group, None: all controllers
+        self.control_groups = {0: None}
+        for group in np.unique(self.groups[self.groups != 0]).tolist():
+            self.control_groups[group] = tuple(i for i, step_size in enumerate(controller_step_sizes) 
+                                               if group >> rates.index(step_size) & 1)
+        #index of the first halting point of every time series
+        self.segment_starts = np.array(segments, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.step_sizes)
+
+    def __repr__(self):
+        return (f"StepPlan({len(self)} halting points, {len(self.start_times)} time series, "
+                f"{self.count(self.CONTROL)} control, {self.count(self.OUTPUT)} output, {self.count(self.RETROFIT)} retrofit, "
+                f"{len(self.control_groups)} control groups)")
+
+    def count(self, flag):
+        '''
+        Get the number of halting points, at which the given flag is set.
+        '''
+        return int(np.count_nonzero(self.flags & flag))
+
+    def discard_outputs_before(self, time):
+        '''
+        Remove the OUTPUT flag of all halting points before the given time (e.g. to discard the results of a spin-up period).
+
+        Args:
+            - time: simulation time, has to be a halting point of the plan
+        '''
+        index = int(np.searchsorted(self.halting_points, time))
+        if index >= len(self) or self.halting_points[index] != time:
+            raise ValueError(f"{time} s is no halting point of the simulation")
+        self.flags[:index] &= ~np.uint8(self.OUTPUT)
+
+    def iterate(self, start_index=0, stop_index=None):
+        '''
+        Iterate over (step_size, flags, control group) of the halting points from start_index to stop_index (excluded) as Python numbers.
+        '''
+        return zip(self.step_sizes[start_index:stop_index].tolist(), self.flags[start_index:stop_index].tolist(), 
+                   self.groups[start_index:stop_index].tolist())
+
+    def get_step_size_runs(self):
+        '''
+        Get the step sizes of the plan in run-length encoded form (see run_length_encode_step_size_arr()), e.g. for inspection.
+
+        Returns:
+            list of tuples (step_size, number of consecutive steps)
+        '''
+        step_sizes, counts = run_length_encode_step_size_arr(self.step_sizes)
+        return list(zip(step_sizes.tolist(), counts.tolist()))
+
+    def __iter__(self):
+        '''
+        Iterate over (step_size, flags, control group) of all halting points as Python numbers.
+        '''
+        return self.iterate()
+
+
+def get_step_plan(start_time, stop_time, writer_step_size, controller_step_size, max_permitted_time_step, schedule: dict = None,
+                  controller_step_sizes = None):
+    '''
+    Generates the StepPlan of a simulation.
+
+    Parameters:
+        start_time, stop_time, writer_step_size, controller_step_size, max_permitted_time_step: passed to get_step_size_arr()
+            (controller_step_size is None, if no controller is active)
+        schedule: if passed, parsed schedule of retrofits and/or occupancy changes (see schedule_step_size_array())
+        controller_step_sizes: if passed, step sizes of every controller (see ControllerWrapper.controller_step_sizes), 
+            the halting points of all of them are generated
+
+    Returns:
+        StepPlan
+    '''
+    #halting points of all controller step sizes
+    grid_controller_step_size = controller_step_sizes if controller_step_sizes else controller_step_size
+    if schedule:
+        step_size_arrays, start_times = schedule_step_size_array(start_time,
+                                                                 stop_time,
+                                                                 writer_step_size,
+                                                                 grid_controller_step_size,
+                                                                 max_permitted_time_step=max_permitted_time_step,
+                                                                 schedule=schedule)
+    else:
+        step_size_arrays = [get_step_size_arr(start_time,
+                                              stop_time,
+                                              writer_step_size,
+                                              grid_controller_step_size,
+                                              max_permitted_time_step=max_permitted_time_step)]
+        start_times = [start_time]
+    return StepPlan(step_size_arrays, start_times, writer_step_size, controller_step_size, controller_step_sizes)
@@ -4,12 +4,20 @@ import numpy as np
 import random
 from typing import List
 from src.utils.util_functions import load_json,load_hygienicalWindowOpening_data,load_internalGain_data,load_weather_data
+from src.utils.fmu_cache import FMUCache
+from src.utils.resource_packs import set_resource_pack_dir,compile_resource_packs
+from src.utils.design_day_stats import set_design_day_stats_dir
 
 class Config:
     def __init__(self, 
                  config_path: os.path, 
                  fmu_path: os.path, 
-                 output_path: os.path
+                 output_path: os.path,
+                 cache_path: os.path = "cache",
+                 reuse_fmu_instances: bool = False,
+                 result_chunk_size: int = None,
+                 share_schedule_segments: bool = False,
+                 resource_packs: bool = False
                  ):
         
         ''' 
@@ -19,6 +27,14 @@ class Config:
             - config_path: The path to the config json file.
             - fmu_path: The path to the fmu.
             - output_path: The path where the output of the simulations will be written to.
+            - cache_path: The path where cached data (e.g. the extracted FMU) is stored.
+            - reuse_fmu_instances: If True, FMU instances are reset and reused for subsequent simulations of a worker process (see FMUInstancePool).
+            - result_chunk_size: If set, the workers write the results to the csv files in chunks of this number of rows while simulating (see ResultWriter),
+                    else the results of a simulation are kept in memory and written after the simulation.
+            - share_schedule_segments: If True, simulations with a schedule share identical time series between retrofits 
+                    (e.g. the same base building before the first retrofit), every distinct time series is simulated once (see SegmentCache).
+            - resource_packs: If True, the input profile files used in the simulation series are compiled into binary packs in the cache path, 
+                    which all worker processes map into memory instead of parsing the text files (see compile_resource_packs()).
 
         Returns: None
         '''
@@ -27,10 +43,36 @@ class Config:
         self.STOP_TIME_DEFAULT = 86400
         self.WRITER_STEP_SIZE_DEFAULT = 900
         self.CONTROLLER_STEP_SIZE_DEFAULT = 900
+        #accuracy profiles of the simulation: tolerance passed to setupExperiment of the FMU (None: default of the FMU solver)
+        #and an upper bound for the communication step size in seconds (None: given by the input profiles)
+        self.ACCURACY_PROFILE_DEFAULT = "default"
+        self.ACCURACY_PROFILES = {
+            "screening": {"tolerance": 1e-4, "max_step_size": None},
+            "default": {"tolerance": None, "max_step_size": None},
+            "validation": {"tolerance": 1e-8, "max_step_size": 60}
+        }
+        self.INPUT_PROFILE_KEYS = ["weaDat.fileName", "internalGain.fileName", "hygienicalWindowOpening.fileName"]
 
         self.config_path = config_path
         self.fmu_path = fmu_path
         self.output_path = output_path
+        self.cache_path = cache_path
+        self.reuse_fmu_instances = reuse_fmu_instances
+        self.result_chunk_size = result_chunk_size
+        self.share_schedule_segments = share_schedule_segments
+        #segments shared within one simulation series (directory of the process starting the series, removed afterwards)
+        self.segment_dir = os.path.join(self.cache_path, "segments", str(os.getpid()))
+        #packs of the input profile files, None: the files are parsed as text (see resource_packs.py)
+        self.resource_pack_dir = os.path.join(self.cache_path, "resource_packs") if resource_packs else None
+        set_resource_pack_dir(self.resource_pack_dir)
+        #design-day statistics of the input profile files used by the nominal power calculators (see design_day_stats.py)
+        self.design_day_stats_dir = os.path.join(self.cache_path, "design_day_stats")
+        set_design_day_stats_dir(self.design_day_stats_dir)
+
+        self.fmu_cache = FMUCache(self.fmu_path, self.cache_path)
+
+        #timing information of the input profiles per combination of profile files (see get_input_profile_timing())
+        self.input_profile_cache = dict()
 
         self.fmu_name = os.path.split(self.fmu_path)[-1]
         
@@ -76,12 +118,15 @@ class Config:
             "variation_type": "default",
             "controller_name": None,
             "controller_step_size": self.CONTROLLER_STEP_SIZE_DEFAULT,
+            "controller_step_sizes": {},
             "converter_functions": [],
             "start_time": self.START_TIME_DEFAULT,
             "stop_time": self.STOP_TIME_DEFAULT,        # Equals one day default
             "writer_step_size": self.WRITER_STEP_SIZE_DEFAULT,        # Equals 15 minutes default
             "columns_included": [],                      # Default: include all columns
-            "time_columns_included": ["second_of_day","day_of_year"]
+            "time_columns_included": ["second_of_day","day_of_year"],
+            "accuracy_profile": self.ACCURACY_PROFILE_DEFAULT,
+            "spin_up_time": 0
         }
 
         # Parse variations
@@ -126,6 +171,13 @@ class Config:
         else:
             parsed["controller_step_size"] = parsed["writer_step_size"] # If no controller step size is given, the normal step size is used.
 
+        # Parse the own step sizes of single controllers (controller name -> step size)
+        controller_step_sizes = config.get("controller_step_sizes", {})
+        if not isinstance(controller_step_sizes, dict) or \
+                any(not isinstance(step_size, (int, float)) or step_size <= 0 or step_size % 1 != 0 for step_size in controller_step_sizes.values()):
+            raise ValueError("malformatted parameter 'controller_step_sizes': "+str(controller_step_sizes)+"  --> should be a dict of controller names and positive integer step sizes")
+        parsed["controller_step_sizes"] = {controller_name: int(step_size) for controller_name, step_size in controller_step_sizes.items()}
+
         # Parse converter functions
         converter_functions = config.get("converter_functions", None)
         if converter_functions:
@@ -143,6 +195,19 @@ class Config:
             parsed["time_columns_included"] = time_columns_included
 
 
+        # Parse the accuracy profile (solver tolerance and maximum communication step size)
+        accuracy_profile = config.get("accuracy_profile", self.ACCURACY_PROFILE_DEFAULT)
+        if accuracy_profile not in self.ACCURACY_PROFILES:
+            raise ValueError("malformatted parameter 'accuracy_profile': "+str(accuracy_profile)+"  --> should be one of "+str(list(self.ACCURACY_PROFILES)))
+        parsed["accuracy_profile"] = accuracy_profile
+
+        # Parse the spin-up period, whose results are discarded (has to be a multiple of writer_step_size)
+        spin_up_time = config.get("spin_up_time", 0)
+        if not isinstance(spin_up_time, (int, float)) or spin_up_time < 0 or spin_up_time % parsed["writer_step_size"] != 0 \
+                or spin_up_time >= parsed["stop_time"] - parsed["start_time"]:
+            raise ValueError("malformatted parameter 'spin_up_time': "+str(spin_up_time)+"  --> should be a multiple of writer_step_size and shorter than the simulated time")
+        parsed["spin_up_time"] = int(spin_up_time)
+
 
         return parsed
     
@@ -195,10 +260,99 @@ class Config:
     
 
         
-    def get_max_permitted_time_step(self):
+    def get_input_profile_files(self, parameter_set=None):
+        '''
+        Get the input profile files (weather, internal gain, window opening) used with a parameter set.
+
+        Args:
+            - parameter_set: dict-like parameter set (e.g. a variation), parameters not contained are taken from the config 
+                    (first value, if a list of values is configured). If None, only the config is considered.
+
+        Returns:
+            tuple of the file paths, ordered like INPUT_PROFILE_KEYS
+        '''
+        tr=dict(self.config["variations"])
+        if parameter_set: tr.update(dict(parameter_set))
+        files=[tr.get(k) for k in self.INPUT_PROFILE_KEYS]
+        return tuple(f[0] if isinstance(f,list) else f for f in files)
+
+    def get_input_profile_timing(self, parameter_set=None):
+        '''
+        Get the timing information of the input profiles used with a parameter set, currently the max_permitted_time_step 
+        (see get_max_permitted_time_step()).
+
+        The information is computed once per distinct combination of profile files and cached in the Config object 
+        (see prepare_input_profiles()).
+
+        Args:
+            - parameter_set: dict-like parameter set (e.g. a variation), see get_input_profile_files()
+
+        Returns:
+            dict with key "max_permitted_time_step" (int)
+        '''
+        files=self.get_input_profile_files(parameter_set)
+        if files in self.input_profile_cache:
+            return self.input_profile_cache[files]
+
+        tr=dict(zip(self.INPUT_PROFILE_KEYS,files))
+        df_hygienicalWindowOpening=load_hygienicalWindowOpening_data(tr)
+        df_internalGain=load_internalGain_data(tr)
+        df_weather=load_weather_data(tr)
+
+        #get time step of external profiles who have different values in its data
+        time_steps_to_consider=[df.index.diff().min().total_seconds() for df in  
+                [df_hygienicalWindowOpening, df_internalGain, df_weather] if df.nunique().max().item()>1]
+
+        time_steps_to_consider.append(np.inf)  #set dummy value, if time_steps_to_consider is empty (will do nothing)
+        self.input_profile_cache[files]={"max_permitted_time_step":int(min(time_steps_to_consider))}
+        return self.input_profile_cache[files]
+
+    def prepare_input_profiles(self, parameter_sets):
+        '''
+        Computes the timing information of the input profiles (see get_input_profile_timing()) for all distinct 
+        combinations of profile files in the parameter sets, e.g. all variations of a simulation series.
+        Called once before the simulations, so that the information is available in the Config object passed to the workers.
+
+        Args:
+            - parameter_sets: list of dict-like parameter sets
+        '''
+        combinations={self.get_input_profile_files(parameter_set) for parameter_set in parameter_sets}
+        for parameter_set in parameter_sets:
+            self.get_input_profile_timing(parameter_set)
+        print(f"#prepared input profile timing for {len(combinations)} combination(s) of input profile files")
+
+    def compile_resource_packs(self, parameter_sets):
+        '''
+        Compiles the input profile files used with the parameter sets (e.g. all variations of a simulation series and 
+        the updates of their schedules) into packs, if resource packs are enabled. Packs that are up to date are kept.
+
+        Args:
+            - parameter_sets: list of dict-like parameter sets
+        '''
+        if self.resource_pack_dir is None:
+            return
+        fnames={f for parameter_set in parameter_sets for f in self.get_input_profile_files(parameter_set) if f}
+        n_compiled=compile_resource_packs(fnames)
+        print(f"#compiled {n_compiled} of {len(fnames)} resource pack(s) to {self.resource_pack_dir}")
+
+    def get_accuracy_profile(self):
+        '''
+        Get the settings of the selected accuracy profile (config key "accuracy_profile").
+
+        Returns:
+            dict with "tolerance" (for setupExperiment, None for the default of the FMU solver) and 
+            "max_step_size" (upper bound for the communication step size in seconds, None if not limited)
+        '''
+        return self.ACCURACY_PROFILES[self.get("accuracy_profile")]
+
+    def get_max_permitted_time_step(self, parameter_sets=None):
         '''
         Function calculates this max_permitted_time_step, considered are files with changes in data (at least two different values in data), that are supposed to affect the dynamics in the model
         
+        Args:
+            - parameter_sets: list of dict-like parameter sets (e.g. a variation and its retrofits), whose profile files are considered. 
+                    If None, the first files of the config are considered.
+
         Returns:
         max_permitted_time_step (int): Defines the maximum allowable 
         time step, expressed in seconds, that is consistent with the resolution 
@@ -209,19 +363,8 @@ class Config:
         to be seen by the user in the results.
 
         '''
-
-        df_hygienicalWindowOpening=load_hygienicalWindowOpening_data(self.config["variations"])
-        df_internalGain=load_internalGain_data(self.config["variations"])
-        df_weather=load_weather_data(self.config["variations"])
-        
-        #get time step of external profiles who have different values in its data
-        time_steps_to_consider=[df.index.diff().min().total_seconds() for df in  
-                [df_hygienicalWindowOpening, df_internalGain, df_weather] if df.nunique().max().item()>1]
-
-        time_steps_to_consider.append(np.inf)  #set dummy value, if time_steps_to_consider is empty (will do nothing)
-        max_permitted_time_step=int(min(time_steps_to_consider))
-        return(max_permitted_time_step)
-            
+        if parameter_sets is None: parameter_sets=[None]
+        return min(self.get_input_profile_timing(parameter_set)["max_permitted_time_step"] for parameter_set in parameter_sets)
 
 
 
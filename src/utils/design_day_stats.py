@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import tempfile
+from src.utils.resource_cache import get_resource_cache
+from src.utils.util_functions import load_weather_data,load_internalGain_data,df_findcol
+
+#increase, if the statistics change, to invalidate existing statistics files
+DESIGN_DAY_STATS_VERSION = 1
+
+#directory of the statistics files of the process (see set_design_day_stats_dir()), None: the statistics aren't stored on disk
+design_day_stats_dir = None
+
+
+def compute_weather_stats(fname):
+    '''
+    Compute the design-day statistics of a weather file used by the nominal power calculators.
+
+    Returns:
+        dict with the minimum outdoor temperature "min_temperature" and the highest daily mean outdoor temperature
+        "max_daily_mean_temperature" in °C and the maximum hourly means of the global horizontal, direct normal and
+        diffuse horizontal radiation in Wh/m² ("max_hourly_global_horizontal_radiation",
+        "max_hourly_direct_normal_radiation", "max_hourly_diffuse_horizontal_radiation")
+    '''
+    weather_data = load_weather_data({"weaDat.fileName": fname})
+    temperature = df_findcol(weather_data, "dry bulb temperature")
+    return {
+        "min_temperature": temperature.min().item(),
+        "max_daily_mean_temperature": temperature.resample("1d").mean().max().item(),
+        "max_hourly_global_horizontal_radiation": df_findcol(weather_data, "global horizontal radiation").resample("1h").mean().max().item(),
+        "max_hourly_direct_normal_radiation": df_findcol(weather_data, r"^#C\d+ direct normal radiation").resample("1h").mean().max().item(),
+        "max_hourly_diffuse_horizontal_radiation": df_findcol(weather_data, "diffuse horizontal radiation").resample("1h").mean().max().item()
+    }
+
+def compute_internalGain_stats(fname):
+    '''
+    Compute the design-day statistics of an internal gain profile used by the nominal cooling power calculator.
+
+    Returns:
+        dict with the highest daily mean of the internal gains "max_daily_mean_internal_gains" in W
+        (the time unit of the file is read as in load_internalGain_data())
+    '''
+    return {"max_daily_mean_internal_gains": load_internalGain_data({"internalGain.fileName": fname}).resample("1d").mean().max().item()}
+
+
+def set_design_day_stats_dir(stats_dir):
+    '''
+    Set the directory of the statistics files of the process (Config.design_day_stats_dir in the cache path).
+    Set by the Config and by every SimulationController, so that the worker processes use the statistics of the main process.
+    '''
+    global design_day_stats_dir
+    design_day_stats_dir = stats_dir
+
+def get_stats_path(fname):
+    '''
+    Get the path of the statistics file of a resource file in the statistics directory, 
+    named by the file and a hash of its absolute path (files of different directories may have the same name).
+    '''
+    name = os.path.basename(fname)+"."+hashlib.sha1(os.path.abspath(fname).encode()).hexdigest()[:12]
+    return os.path.join(design_day_stats_dir, name+".stats.json")
+
+def get_stats_source_info(fname, compute):
+    '''
+    Get the identification of the source of the statistics: modification time and size of the file and the computing function.
+    '''
+    stat = os.stat(fname)
+    return {"version": DESIGN_DAY_STATS_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "statistics": compute.__name__}
+
+def load_design_day_stats(fname, compute):
+    '''
+    Load the statistics of a resource file from its statistics file, compute them with compute(fname) and store them,
+    if the file doesn't exist or was computed from another version of the resource file.
+    If no statistics directory is set, the statistics are computed without storing them.
+
+    Args:
+        - fname: path of the resource file
+        - compute: function computing the statistics (e.g. compute_weather_stats())
+
+    Returns:
+        dict of the statistics
+    '''
+    if design_day_stats_dir is None:
+        return compute(fname)
+    path = get_stats_path(fname)
+    source_info = get_stats_source_info(fname, compute)
+    if os.path.isfile(path):
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+            if stored["source"] == source_info:
+                return stored["stats"]
+        except Exception:
+            pass
+
+    stats = compute(fname)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_file, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".json")
+        with os.fdopen(tmp_file, "w") as f:
+            json.dump({"source": source_info, "stats": stats}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"#could not store the design-day statistics of {fname} ({e})")
+    return stats
+
+
+def get_weather_stats(tr):
+    '''
+    Get the design-day statistics of the weather file of a parameter set (see compute_weather_stats()).
+    The statistics are computed once per weather file, stored on disk and cached per process (see ResourceCache).
+
+    Parameters:
+    tr (dict): A dictionary containing the key 'weaDat.fileName' with the path to the weather data file.
+    '''
+    fname=tr["weaDat.fileName"]
+    if isinstance(fname,list): fname=fname[0]
+    return get_resource_cache().get(load_design_day_stats,fname,compute_weather_stats)
+
+def get_internalGain_stats(tr):
+    '''
+    Get the design-day statistics of the internal gain profile of a parameter set (see compute_internalGain_stats()).
+    The statistics are computed once per file, stored on disk and cached per process (see ResourceCache).
+
+    Parameters:
+    tr (dict): A dictionary containing the key 'internalGain.fileName' with the path to the internal gain data file.
+    '''
+    fname=tr["internalGain.fileName"]
+    if isinstance(fname,list): fname=fname[0]
+    return get_resource_cache().get(load_design_day_stats,fname,compute_internalGain_stats)
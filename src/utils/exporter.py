@@ -58,21 +58,24 @@ class Exporter():
 
     def export_csv(
 			self, 
-			rows, 
+			results, 
 			header,
             header_time_columns,
             info,
 			param_input_list,
-			var_param
+			var_param,
+            save_dir=None
 		):
 
         ''' Export a csv file to a new dir in the output directory
 
 		Arguments:
-			arr: 				the array containing rows to export into the csv file.
-			header:				a list containing the header of the csv file.
+			results: 			2-D array containing the rows to export into the csv file (first column: simulation time in seconds).
+			                    None, if the results were already written to the csv file while simulating (see ResultWriter).
+			header:				a list containing the header of the csv file (column index of results).
 			variations:		    variations for creating the variations info text file. 
 			info:				dict containing all variables with their respective values.
+			save_dir:			directory of the simulation created before by make_result_dir(), if None it is created here.
 
 		Returns:
 			the newly created directory the csv file is written into.
@@ -81,6 +84,40 @@ class Exporter():
 		directory for this csv file only. After that, this function creates
 		a new csv file and writes the rows specified in the arr argument.
 		'''
+        if save_dir is None:
+            save_dir = self.make_result_dir(param_input_list, var_param)
+
+		# Save the csv file generated from the given array.
+        if results is not None:
+            result_writer = ResultWriter(self.get_result_file(save_dir), header_time_columns)
+            result_writer.write(results, header)
+            result_writer.close(header)
+
+		# Add csv file containing all info of the vars set.
+        pd.DataFrame(param_input_list).to_csv(os.path.join(save_dir,"vars_start.csv"),header=["config_var","value"],index=False)
+
+		# Add parm.txt config to the save directory.
+        pd.DataFrame(info).to_csv(os.path.join(save_dir,"para_to_fmu.csv"),header=["config_var","value"],index=False)
+
+		# Add csv file containg only the variated param for the specific simulation
+        pd.DataFrame(var_param).to_csv(os.path.join(save_dir,"variated_param.csv"),header=["fmu_var"]*(len(var_param)>0),index=False)
+
+        return self.dir_name
+    
+
+    def make_result_dir(self, param_input_list, var_param, schedule_name=None):
+
+        ''' 
+        Create the directory for the results of one simulation, named after the values of the variated parameters.
+
+		Arguments:
+			param_input_list:	dict-like list of tuples (<param_name>, <value>) of the simulation (the variation).
+			var_param:			list of the names of the variated parameters.
+			schedule_name:		name of the retrofit schedule, if the series is simulated with several schedules.
+
+		Returns:
+			path to the newly created directory.
+		'''
 
 		#convert param_input_list and var_param to DataFrames
         vars_start=pd.DataFrame(param_input_list,columns=["name","value"]).set_index("name").sort_index(axis=0)
@@ -102,35 +139,24 @@ class Exporter():
             param="_".join([w[:3] for w in param.split("_")])
             #extend identstr by adapted name of parameter in pascal case and value
             identstr+="#"+self.__to_pascal_case(param)+"_"+str(val)
+        if schedule_name is not None:
+            identstr+="#Sch_"+schedule_name
 
 		# Create a new directory to save the csv file in.
         dirname_prefix = identstr
         if identstr=="_":
             dirname_prefix += "single"
-        save_dir = self.__make_csv_save_dir(dirname_prefix)
-        file_name=os.path.join(save_dir,os.path.basename(save_dir)+".csv")
+        return self.__make_csv_save_dir(dirname_prefix)
 
-		# Save the csv file generated from the given array.
-        rows = self.__transform_timestamps(rows,time_columns=header_time_columns) 
-        header = header_time_columns + header[1:] # Replace the first column named "timestamp" with the new columns
-        df = pd.DataFrame(rows,columns=header)
-
-         #sort the columns, except the time_columns specified in "header_time_columns", that are placed on the beginning
-        df=df[header_time_columns + sorted(set(df.columns)-set(header_time_columns)) ]
 
-        df.to_csv(file_name)
-
-		# Add csv file containing all info of the vars set.
-        pd.DataFrame(param_input_list).to_csv(os.path.join(save_dir,"vars_start.csv"),header=["config_var","value"],index=False)
-
-		# Add parm.txt config to the save directory.
-        pd.DataFrame(info).to_csv(os.path.join(save_dir,"para_to_fmu.csv"),header=["config_var","value"],index=False)
+    @staticmethod
+    def get_result_file(save_dir):
 
-		# Add csv file containg only the variated param for the specific simulation
-        pd.DataFrame(var_param).to_csv(os.path.join(save_dir,"variated_param.csv"),header=["fmu_var"]*(len(var_param)>0),index=False)
+        ''' 
+        Get the path of the result csv file in the directory of a simulation (see make_result_dir()).
+        '''
+        return os.path.join(save_dir,os.path.basename(save_dir)+".csv")
 
-        return self.dir_name
-    
 
     def __make_csv_save_dir(self, dirname):
 
@@ -217,49 +243,6 @@ class Exporter():
         return ''.join(x.title() for x in components)
     
 
-    def __transform_timestamps(self,data,time_columns):
-        '''
-        Transform the first column of each sublist to new columns as stated in parameter time_columns:
-		     e.g. "time:second_of_day": second of the day and "time:day_of_year": day of the year.
-
-		Args:
-			data (list of lists): Input data with each sublist containing a timestep in seconds.
-            time_columns (list of strings): Columns to be created based on the time stamp in seconds in the data (1st column).
-
-		Returns:
-			list of lists: Transformed data with new columns replacing the original timestep column.
-		'''
-        time_expressions_available_functions_dict = {
-            "second": lambda current_time: (current_time - start_time).total_seconds(),
-            "minute": lambda current_time: (current_time - start_time).total_seconds()//60,
-            "hour": lambda current_time: (current_time - start_time).total_seconds()//3600,
-            "day": lambda current_time: (current_time - start_time).total_seconds()//86400,
-            "year": lambda current_time: (current_time - start_time).total_seconds()//31536000,
-            "second_of_day": lambda current_time: current_time.hour * 3600 + current_time.minute * 60 + current_time.second,
-            "minute_of_day": lambda current_time: current_time.hour * 60 + current_time.minute,
-            "day_of_year": lambda current_time: current_time.timetuple().tm_yday,
-            "day_of_month": lambda current_time: current_time.day,
-            "week_of_year": lambda current_time: current_time.isocalendar()[1],
-            "nanosecond_of_month": lambda current_time: (current_time - current_time.replace(day=1)).total_seconds() * 1e9
-        }
-
-		# Assume the input time in seconds is elapsed time since the start of the first day
-        start_time = datetime.datetime(2023, 1, 1)  # An arbitrary starting point (start of a non leap year) to make datetime calculations and exctract seconds of day and day of year afterwards (--> assuming here, it's January 1st, 2023 0 a.m.)
-
-        for index_row,row in enumerate(data):
-            second = row[0]    #total time in seconds (elapsed simulation time)
-            current_time = start_time + datetime.timedelta(seconds=second)
-
-            
-            time_expression_list=[time_expressions_available_functions_dict[v](current_time) for v in time_columns]
-
-			# Add the new columns and retain column with original time stamp
-            data[index_row]=time_expression_list + row[1:]
-
-
-        return data
-
-
     def copy_fmu_and_config(self):
 
         ''' 
@@ -296,3 +279,85 @@ class Exporter():
             dst_path=os.path.join(self.__get_dir_path(),"git_log_actual_commit.txt")
             open(dst_path,"w").write(actual_commit_str)
 
+
+class ResultWriter():
+    '''
+    Append-only writer of the result csv file of one simulation.
+
+    The results can be written in chunks while the simulation is running (see SimulationController.simulate_fmu()), 
+    so that only one chunk has to be kept in memory. The file is closed after every chunk, 
+    the results written so far can be read while the simulation is in progress.
+    The written file is the same as if all results were written at once.
+
+    Parameters:
+        file_name: path of the csv file, an existing file is overwritten
+        header_time_columns: time columns replacing the timestamp column (see transform_timestamps()), placed at the beginning
+        chunk_size: number of result rows the simulation collects before writing them (None: all rows at once)
+    '''
+    def __init__(self, file_name, header_time_columns, chunk_size=None):
+        self.file_name = file_name
+        self.header_time_columns = header_time_columns
+        self.chunk_size = chunk_size
+        self.n_rows = 0
+        self.b_header_written = False
+
+    def write(self, results, header):
+        '''
+        Append result rows to the csv file.
+
+        Args:
+            - results: 2-D array of result rows (first column: simulation time in seconds)
+            - header: list containing the header of the results (column index of results)
+        '''
+        # Replace the first column named "timestamp" with the new time columns
+        columns = transform_timestamps(results[:,0],time_columns=self.header_time_columns) 
+        columns.update({column:results[:,i] for i,column in enumerate(header) if i>0})
+        df = pd.DataFrame(columns, index=pd.RangeIndex(self.n_rows, self.n_rows+len(results)))
+
+        #sort the columns, except the time_columns specified in "header_time_columns", that are placed on the beginning
+        df=df[self.header_time_columns + sorted(set(df.columns)-set(self.header_time_columns)) ]
+
+        df.to_csv(self.file_name, mode="a" if self.b_header_written else "w", header=not self.b_header_written)
+        self.b_header_written = True
+        self.n_rows += len(results)
+
+    def close(self, header=None):
+        '''
+        Finish the csv file. If no rows were written, a file containing only the header is written (header needed then).
+        '''
+        if not self.b_header_written:
+            self.write(np.empty((0, len(header))), header)
+
+
+def transform_timestamps(timestamps,time_columns):
+    '''
+    Transform the time stamps to new columns as stated in parameter time_columns:
+        e.g. "time:second_of_day": second of the day and "time:day_of_year": day of the year.
+
+    Args:
+        timestamps (np.ndarray): The time stamps in seconds (elapsed simulation time).
+        time_columns (list of strings): Columns to be created based on the time stamps.
+
+    Returns:
+        dict: column name -> list of values of the new column, replacing the original timestep column.
+    '''
+    time_expressions_available_functions_dict = {
+        "second": lambda current_time: (current_time - start_time).total_seconds(),
+        "minute": lambda current_time: (current_time - start_time).total_seconds()//60,
+        "hour": lambda current_time: (current_time - start_time).total_seconds()//3600,
+        "day": lambda current_time: (current_time - start_time).total_seconds()//86400,
+        "year": lambda current_time: (current_time - start_time).total_seconds()//31536000,
+        "second_of_day": lambda current_time: current_time.hour * 3600 + current_time.minute * 60 + current_time.second,
+        "minute_of_day": lambda current_time: current_time.hour * 60 + current_time.minute,
+        "day_of_year": lambda current_time: current_time.timetuple().tm_yday,
+        "day_of_month": lambda current_time: current_time.day,
+        "week_of_year": lambda current_time: current_time.isocalendar()[1],
+        "nanosecond_of_month": lambda current_time: (current_time - current_time.replace(day=1)).total_seconds() * 1e9
+    }
+
+    # Assume the input time in seconds is elapsed time since the start of the first day
+    start_time = datetime.datetime(2023, 1, 1)  # An arbitrary starting point (start of a non leap year) to make datetime calculations and exctract seconds of day and day of year afterwards (--> assuming here, it's January 1st, 2023 0 a.m.)
+
+    current_times = [start_time + datetime.timedelta(seconds=second) for second in timestamps.astype(np.int64).tolist()]
+
+    return {v:[time_expressions_available_functions_dict[v](current_time) for current_time in current_times] for v in time_columns}
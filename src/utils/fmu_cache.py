@@ -0,0 +1,216 @@
+import os
+import shutil
+import tempfile
+import json
+import pickle
+import numpy as np
+from fmpy import extract, read_model_description
+from src.utils.util_functions import get_file_hash
+
+#default values for start values missing in the model description
+FMU_DEFAULTS_JSON_PATH = os.path.join("resources", "FMUs", "fmu_state_dict.json")
+
+#increase, if the content of FMUModelInfo changes, to invalidate existing cache files
+MODEL_INFO_CACHE_VERSION = 2
+
+#model infos already loaded in the current process (fmu hash -> FMUModelInfo)
+_model_info_memo = dict()
+
+
+class FMUModelInfo:
+    '''
+    The information of an FMU's modelDescription.xml needed for the simulation, in a compact form that is cheap to load.
+
+    Contains:
+        - the variable index: name -> position in the arrays value_references, types, causalities and variabilities
+        - vrs: dict name -> {"type", "reference", "start"} of all model variables
+        - default_dict: start values of all model variables, missing start values filled from resources/FMUs/fmu_state_dict.json
+        - guid and model_identifier of the FMU
+        - the dependencies of the model outputs and the state variables from the ModelStructure
+
+    Parameters:
+        fmu_path: path to the FMU file
+        defaults_json_path: path to the json file with the start values missing in the model description
+    '''
+    def __init__(self, fmu_path: os.path, defaults_json_path: os.path = FMU_DEFAULTS_JSON_PATH):
+        model_description = read_model_description(fmu_path)
+        model_variables = model_description.modelVariables
+
+        self.guid = model_description.guid
+        self.model_identifier = model_description.coSimulation.modelIdentifier
+
+        self.names = [variable.name for variable in model_variables]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.value_references = np.array([variable.valueReference for variable in model_variables], dtype=np.uint32)
+        self.types = np.array([variable.type for variable in model_variables])
+        self.causalities = np.array([variable.causality for variable in model_variables])
+        self.variabilities = np.array([variable.variability for variable in model_variables])
+
+        #ModelStructure: names of the continuous states and dependencies of the outputs (None: depends on all variables)
+        self.state_names = {unknown.variable.derivative.name for unknown in model_description.derivatives 
+                            if unknown.variable.derivative is not None}
+        self.output_dependencies = {unknown.variable.name: 
+                                        None if unknown.dependencies is None else [v.name for v in unknown.dependencies] 
+                                    for unknown in model_description.outputs}
+
+        # Get the parameter data from the FMU
+        self.vrs = dict()
+        for variable in model_variables:
+            self.vrs[variable.name]={"type":variable.type,"reference":variable.valueReference,"start":variable.start}
+
+        #get start values from model description
+        self.default_dict={k:
+            float(self.vrs[k]["start"]) if self.vrs[k]["type"]=="Real" 
+                and self.vrs[k]["start"]!=None else \
+            str(self.vrs[k]["start"]) if self.vrs[k]["type"]=="String" 
+                and self.vrs[k]["start"]!=None else \
+            int(self.vrs[k]["start"]) if self.vrs[k]["type"]=="Integer" 
+                and self.vrs[k]["start"]!=None  else \
+            bool(self.vrs[k]["start"]) if self.vrs[k]["type"]=="Boolean" 
+                and self.vrs[k]["start"]!=None  else \
+            self.vrs[k]["start"] \
+            for k in self.vrs.keys()}
+
+        ##store start values to a json file (only use, if all start values are available!)
+        #json.dump(self.default_dict, open(defaults_json_path,"w"), indent=4, sort_keys=True)
+
+        #fill missing start values with those from json
+        self.default_dict.update({k:v for k,v in \
+            json.load(open(defaults_json_path,"r")).items() \
+            if k in self.default_dict.keys() and self.default_dict[k]==None})
+
+    def get_attributes(self, name):
+        '''
+        Get the causality and variability of a model variable (constant-time lookup).
+
+        Args:
+            - name: name of the model variable
+
+        Returns: tuple (causality, variability)
+        '''
+        i = self.index[name]
+        return str(self.causalities[i]), str(self.variabilities[i])
+
+    def get_variables_affected_by_inputs(self, variables, inputs):
+        '''
+        Get the variables, whose values may change when the given inputs are set (without a simulation step in between).
+
+        Based on the ModelStructure of the model description:
+            - the set inputs themselves are affected
+            - parameters, constants and continuous states are not affected
+            - outputs are affected, if they depend on one of the inputs (or if their dependencies are unknown)
+            - all other variables (e.g. local variables) are regarded as affected, as the model description 
+              doesn't provide their dependencies
+
+        Args:
+            - variables: names of the variables to check
+            - inputs: names of the variables that are set
+
+        Returns: list of the affected variables, in the order of variables
+        '''
+        inputs = set(inputs)
+        affected_variables = []
+        for name in variables:
+            if name not in self.index:
+                continue
+            causality, variability = self.get_attributes(name)
+            if name in inputs:
+                affected_variables.append(name)
+            elif causality in ("parameter", "calculatedParameter") or variability in ("constant", "fixed", "tunable") \
+                    or name in self.state_names:
+                continue
+            elif name in self.output_dependencies and self.output_dependencies[name] is not None:
+                if inputs.intersection(self.output_dependencies[name]):
+                    affected_variables.append(name)
+            else:
+                affected_variables.append(name)
+        return affected_variables
+
+
+class FMUCache:
+    '''
+    Content-hashed cache for data derived from an FMU file.
+
+    The parsed model description (see FMUModelInfo) is stored in a binary cache file, 
+    so that it is parsed only once per FMU, not once per simulation.
+
+    The FMU is extracted once into a directory that is named by the hash of the FMU's content, 
+    so that all simulations of a series (and all worker processes) instantiate the FMU from 
+    the same read-only unzip directory instead of extracting and removing the FMU for every 
+    simulation. The parent process extracts the FMU before the simulation series and removes 
+    the directory once, when the series is done.
+
+    Parameters:
+        fmu_path: path to the FMU file
+        cache_path: directory to store cached data in
+    '''
+    def __init__(self, fmu_path: os.path, cache_path: os.path):
+        self.fmu_path = fmu_path
+        self.cache_path = cache_path
+        self.fmu_hash = get_file_hash(self.fmu_path)
+        self.fmu_cache_dir = os.path.join(self.cache_path, "fmu", self.fmu_hash)
+        self.unzip_dir = os.path.abspath(os.path.join(self.fmu_cache_dir, "unzip"))
+        self.model_info_path = os.path.join(self.fmu_cache_dir, "model_info.pickle")
+
+    def extract(self):
+        '''
+        Extract the FMU into the shared unzip directory, if it doesn't exist yet.
+
+        The FMU is extracted into a temporary directory first which is renamed afterwards,
+        so that concurrent calls never see a partially extracted FMU.
+
+        Returns:
+            the unzip directory of the FMU.
+        '''
+        if not os.path.isdir(self.unzip_dir):
+            os.makedirs(self.fmu_cache_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(dir=self.fmu_cache_dir, prefix="unzip_")
+            extract(self.fmu_path, unzipdir=tmp_dir)
+            try:
+                os.rename(tmp_dir, self.unzip_dir)
+            except OSError: #directory was created concurrently by another process
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        return self.unzip_dir
+
+    def get_model_info(self):
+        '''
+        Get the FMUModelInfo of the FMU.
+
+        The model info is taken from memory, if it was already loaded in the current process, 
+        else from the cache file in the cache directory (persisting between simulation series).
+        If there is no valid cache file, the model description is parsed and the cache file is written.
+
+        Returns:
+            FMUModelInfo of the FMU (shared, treat as read-only).
+        '''
+        if self.fmu_hash in _model_info_memo:
+            return _model_info_memo[self.fmu_hash]
+
+        defaults_hash = get_file_hash(FMU_DEFAULTS_JSON_PATH)
+        model_info = None
+        if os.path.isfile(self.model_info_path):
+            try:
+                with open(self.model_info_path, "rb") as f:
+                    cached = pickle.load(f)
+                if cached["version"] == MODEL_INFO_CACHE_VERSION and cached["defaults_hash"] == defaults_hash:
+                    model_info = cached["model_info"]
+            except Exception as e:
+                print(f"#could not load cached model info from {self.model_info_path} ({e}) - parsing model description")
+
+        if model_info is None:
+            model_info = FMUModelInfo(self.fmu_path)
+            os.makedirs(self.fmu_cache_dir, exist_ok=True)
+            tmp_file, tmp_path = tempfile.mkstemp(dir=self.fmu_cache_dir, suffix=".pickle")
+            with os.fdopen(tmp_file, "wb") as f:
+                pickle.dump({"version": MODEL_INFO_CACHE_VERSION, "defaults_hash": defaults_hash, "model_info": model_info}, f, 
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.model_info_path)
+
+        _model_info_memo[self.fmu_hash] = model_info
+        return model_info
+
+    def cleanup(self):
+        '''
+        Remove the extracted FMU. Should be called once, after all simulations using the unzip directory are done.
+        '''
+        shutil.rmtree(self.unzip_dir, ignore_errors=True)
@@ -0,0 +1,114 @@
+import atexit
+import platform
+from fmpy.fmi2 import FMU2Slave
+
+#instance pools of the current process (unzip directory -> FMUInstancePool)
+_instance_pools = dict()
+
+
+class FMUInstancePool:
+    '''
+    Per-process pool of FMU instances, that are reused for subsequent simulations instead of being
+    instantiated, initialized and freed again for every variation.
+
+    A released instance is terminated and reset with fmi2Reset, which brings it back to the state
+    after instantiation (all variables at their start values). The next simulation sets up the
+    experiment and parameterizes it like a fresh instance.
+    If terminating or resetting an instance fails, it is freed and the next simulation gets a fresh instance.
+
+    Parameters:
+        unzip_dir: directory of the extracted FMU (see FMUCache)
+        model_info: FMUModelInfo of the FMU
+        max_size: maximum number of idle instances kept in the pool
+    '''
+    def __init__(self, unzip_dir, model_info, max_size: int = 2):
+        self.unzip_dir = unzip_dir
+        self.model_info = model_info
+        self.max_size = max_size
+        self.idle_instances = []
+
+    def acquire(self):
+        '''
+        Get an instantiated FMU, either an idle instance from the pool or a new one.
+
+        Returns:
+            FMU2Slave in the state after instantiation (setupExperiment not called yet).
+        '''
+        if self.idle_instances:
+            return self.idle_instances.pop()
+
+        fmu = FMU2Slave(
+            guid=self.model_info.guid,
+            unzipDirectory=self.unzip_dir,
+            modelIdentifier=self.model_info.model_identifier,
+            instanceName='fmu_variations'
+        )
+        fmu.instantiate()
+        return fmu
+
+    def release(self, fmu):
+        '''
+        Return an FMU instance to the pool after a simulation. The instance is terminated and reset.
+        If this fails or the pool is full, the instance is freed instead.
+
+        Args:
+            - fmu: FMU2Slave acquired from this pool
+        '''
+        try:
+            fmu.terminate()
+        except Exception: #e.g. if the FMU wasn't initialized, fmi2Reset is permitted anyway
+            pass
+        try:
+            fmu.reset()
+        except Exception as e:
+            print(f"#FMU instance could not be reset ({e}) - next simulation uses a fresh instance.")
+            self.free_instance(fmu)
+            return
+
+        if len(self.idle_instances) < self.max_size:
+            self.idle_instances.append(fmu)
+        else:
+            self.free_instance(fmu)
+
+    def free_instance(self, fmu):
+        '''
+        Free an FMU instance, errors are ignored.
+        '''
+        try:
+            if platform.system().lower()=="linux": #currently deactivated on windows as it broke the execution in tests
+                fmu.freeInstance()
+        except Exception:
+            pass
+
+    def clear(self):
+        '''
+        Free all idle instances of the pool.
+        '''
+        while self.idle_instances:
+            self.free_instance(self.idle_instances.pop())
+
+
+def get_instance_pool(fmu_cache):
+    '''
+    Get the instance pool of the current process for the FMU of an FMUCache. The pool is created on first use.
+
+    Args:
+        - fmu_cache: FMUCache of the FMU
+
+    Returns:
+        FMUInstancePool
+    '''
+    unzip_dir = fmu_cache.extract()
+    if unzip_dir not in _instance_pools:
+        _instance_pools[unzip_dir] = FMUInstancePool(unzip_dir, fmu_cache.get_model_info())
+    return _instance_pools[unzip_dir]
+
+
+def clear_instance_pools():
+    '''
+    Free the idle instances of all pools of the current process. Called before the shared unzip directory is removed and at exit.
+    '''
+    for instance_pool in _instance_pools.values():
+        instance_pool.clear()
+
+atexit.register(clear_instance_pools)
@@ -0,0 +1,105 @@
+import os
+import sys
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+#default memory limit of the parsed resource files cached per process in bytes
+RESOURCE_CACHE_MAX_BYTES = 256 * 2**20
+
+
+class ResourceCache:
+    '''
+    In-memory LRU cache of parsed resource files (weather files, internal gain and window opening profiles).
+
+    The converter functions and the Config parse the same files for every variation and every re-initialization
+    of a retrofit. With the cache, every file is parsed once per process and parser arguments. Entries are keyed by the
+    path, the modification time and the size of the file, so a changed file is parsed anew. If the cached objects exceed
+    max_bytes, the least recently used entries are evicted; objects larger than max_bytes aren't cached.
+
+    The cached objects are shared by all callers and must not be modified (copy them before modifying).
+
+    Parameters:
+        max_bytes: memory limit of the cached objects in bytes
+    '''
+    def __init__(self, max_bytes=RESOURCE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    #key -> (parsed object, size in bytes)
+        self.n_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def get_key(parser, path, args):
+        '''
+        Get the key of a parsed file.
+
+        Args:
+            - parser: function parsing the file
+            - path: path of the file
+            - args: further arguments of the parser
+
+        Returns:
+            tuple of the parser, the absolute path, the modification time and size of the file and the arguments
+        '''
+        stat = os.stat(path)
+        return (parser.__module__, parser.__qualname__, os.path.abspath(path), stat.st_mtime_ns, stat.st_size, args)
+
+    def get(self, parser, path, *args):
+        '''
+        Get a parsed file from the cache, parse it with parser(path, *args) if it isn't cached.
+
+        Args:
+            - parser: function parsing the file
+            - path: path of the file
+            - args: further (hashable) arguments of the parser
+
+        Returns:
+            the parsed file (shared, don't modify it)
+        '''
+        key = self.get_key(parser, path, args)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return self.entries[key][0]
+
+        self.stats["misses"] += 1
+        parsed = parser(path, *args)
+        n_bytes = get_size(parsed)
+        if n_bytes <= self.max_bytes:
+            self.entries[key] = (parsed, n_bytes)
+            self.n_bytes += n_bytes
+            while self.n_bytes > self.max_bytes:
+                _, (_, n_bytes_evicted) = self.entries.popitem(last=False)
+                self.n_bytes -= n_bytes_evicted
+                self.stats["evictions"] += 1
+        return parsed
+
+    def clear(self):
+        '''
+        Remove all entries.
+        '''
+        self.entries.clear()
+        self.n_bytes = 0
+
+
+def get_size(parsed):
+    '''
+    Get the memory usage of a parsed file in bytes (estimate for objects other than DataFrames, Series and arrays).
+    '''
+    if isinstance(parsed, (pd.DataFrame, pd.Series)):
+        return int(np.sum(parsed.memory_usage(deep=True)))
+    if isinstance(parsed, np.ndarray):
+        return parsed.nbytes
+    return sys.getsizeof(parsed)
+
+
+resource_cache = None
+
+def get_resource_cache():
+    '''
+    Get the ResourceCache of the process (every worker process has its own cache).
+    '''
+    global resource_cache
+    if resource_cache is None:
+        resource_cache = ResourceCache()
+    return resource_cache
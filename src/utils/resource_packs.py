@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+#increase, if the content of the pack files changes, to invalidate existing packs
+RESOURCE_PACK_VERSION = 1
+
+#directory of the packs of the process (see set_resource_pack_dir()), None: packs are disabled and the files are parsed as text
+resource_pack_dir = None
+
+
+def read_weather_table(fname):
+    '''
+    Read the table of a Modelica weather file.
+
+    Returns:
+        pd.DataFrame with the columns named according to the file header, indexed by the time in seconds
+    '''
+    header=open(fname,"r").read().split("\n")[11:40]
+    df=pd.read_csv(fname, sep='\t', decimal='.', skiprows=40,header=None,index_col=0).iloc[:,0:29]
+    df.columns=header
+    return df
+
+def read_profile_table(fname):
+    '''
+    Read the table of a profile file (internal gains, window opening).
+
+    Returns:
+        pd.DataFrame indexed by the first column of the file (time in the unit of the profile)
+    '''
+    return pd.read_csv(fname,sep="\t",skiprows=[1],index_col=0)
+
+#functions reading the tables of the resource files by file extension, other files aren't compiled into packs
+PACK_READERS = {
+    ".mos": read_weather_table,
+    ".txt": read_profile_table
+}
+
+
+def set_resource_pack_dir(pack_dir):
+    '''
+    Set the directory of the packs of the process (Config.resource_pack_dir), None disables the packs.
+    Set by the Config and by every SimulationController, so that the worker processes use the packs of the main process.
+    '''
+    global resource_pack_dir
+    resource_pack_dir = pack_dir
+
+def get_pack_paths(fname):
+    '''
+    Get the paths of the pack of a resource file: the array of the table (.npy) and its metadata (.json) 
+    in the pack directory, named by the file and a hash of its absolute path (files of different directories may have the same name).
+    '''
+    name = os.path.basename(fname)+"."+hashlib.sha1(os.path.abspath(fname).encode()).hexdigest()[:12]
+    return os.path.join(resource_pack_dir, name+".npy"), os.path.join(resource_pack_dir, name+".json")
+
+def get_source_info(fname, reader):
+    '''
+    Get the identification of the source of a pack: modification time and size of the file and the reader of its table.
+    '''
+    stat = os.stat(fname)
+    return {"version": RESOURCE_PACK_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "reader": reader.__name__}
+
+
+def compile_resource_pack(fname, reader):
+    '''
+    Compile a resource file into a pack: the table is stored as a 2-D float64 array (first column: index of the table,
+    further columns: the columns of the table) in a .npy file, the names of the columns and the index and the
+    identification of the source file in a .json file. Both files are written to temporary files first
+    which are renamed afterwards, so that concurrent readers never open a partially written pack.
+
+    Args:
+        - fname: path of the resource file
+        - reader: function reading the table of the file (e.g. read_weather_table())
+    '''
+    array_path, meta_path = get_pack_paths(fname)
+    os.makedirs(os.path.dirname(array_path), exist_ok=True)
+    source_info = get_source_info(fname, reader)
+    df = reader(fname)
+    array = np.column_stack([df.index.to_numpy(dtype=np.float64), df.to_numpy(dtype=np.float64)])
+    meta = {"source": source_info, "columns": list(df.columns), "index_name": df.index.name}
+
+    tmp_file, tmp_path = tempfile.mkstemp(dir=os.path.dirname(array_path), suffix=".npy")
+    with os.fdopen(tmp_file, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, array_path)
+    tmp_file, tmp_path = tempfile.mkstemp(dir=os.path.dirname(meta_path), suffix=".json")
+    with os.fdopen(tmp_file, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+def is_pack_up_to_date(fname, reader):
+    '''
+    Check if the pack of a resource file exists and was compiled from the current version of the file.
+    '''
+    array_path, meta_path = get_pack_paths(fname)
+    if not (os.path.isfile(array_path) and os.path.isfile(meta_path)):
+        return False
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)["source"] == get_source_info(fname, reader)
+    except Exception:
+        return False
+
+def compile_resource_packs(fnames):
+    '''
+    Compile the resource files with a reader in PACK_READERS into packs in the pack directory (see set_resource_pack_dir()),
+    packs that are up to date are kept.
+
+    Args:
+        - fnames: paths of the resource files (e.g. the input profile files used in the simulation series)
+
+    Returns:
+        int: number of compiled packs
+    '''
+    n_compiled = 0
+    for fname in sorted(set(fnames)):
+        reader = PACK_READERS.get(os.path.splitext(fname)[1].lower())
+        if reader is None or not os.path.isfile(fname) or is_pack_up_to_date(fname, reader):
+            continue
+        try:
+            compile_resource_pack(fname, reader)
+            n_compiled += 1
+        except Exception as e:
+            print(f"#could not compile resource pack of {fname} ({e}) - the file is parsed as text")
+    return n_compiled
+
+
+def open_resource_pack(fname, reader):
+    '''
+    Open the pack of a resource file memory-mapped, so that all processes using it share the same pages
+    of the page cache instead of holding their own copy.
+
+    Returns:
+        pd.DataFrame of the table (see compile_resource_pack()), backed by the read-only memory-mapped array.
+        None if the packs are disabled or there is no up to date pack.
+    '''
+    if resource_pack_dir is None or not is_pack_up_to_date(fname, reader):
+        return None
+    array_path, meta_path = get_pack_paths(fname)
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        array = np.load(array_path, mmap_mode="r")
+    except Exception as e:
+        print(f"#could not open resource pack of {fname} ({e}) - the file is parsed as text")
+        return None
+    return pd.DataFrame(array[:, 1:], index=pd.Index(array[:, 0], name=meta["index_name"]), columns=meta["columns"], copy=False)
+
+def load_resource_table(fname, reader):
+    '''
+    Load the table of a resource file from its pack, if the packs are enabled and it is up to date 
+    (see compile_resource_packs()), otherwise read it with reader(fname).
+
+    Returns:
+        pd.DataFrame of the table, indexed by the first column of the file.
+        Values of packs are float64, the DataFrame is read-only.
+    '''
+    df = open_resource_pack(fname, reader)
+    if df is None:
+        df = reader(fname)
+    return df
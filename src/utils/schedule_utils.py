@@ -1,4 +1,5 @@
 from src.utils.util_functions import parse_duration, get_step_size_arr
+import copy
 
 def parse_schedule(schedule: dict, global_start: int, global_stop: int):
 	'''
@@ -47,6 +48,33 @@ def parse_schedule(schedule: dict, global_start: int, global_stop: int):
 	return sorted_events
 
 
+def get_variation_updates(variation, schedule: dict):
+	'''
+	accumulates the events of a parsed schedule (see parse_schedule) onto a variation, 
+	the resulting parameter sets correlate with the retrofit halting points of the simulation
+
+	arguments:
+		variation: dict-like list of tuples (<param_name>, <value>) containing all variated parameters
+		schedule: formatted schedule dict
+
+	returns:
+		variation_updates: list of dict-like arrays, one per event of the schedule (plus a copy of the last one)
+	'''
+	variation_updates = [dict(variation)]
+	for index, timestamp in enumerate(schedule):
+
+		# if heatPower was updated last step but should not be updated this time, remove key
+		remove_heater_update = False
+		if "Heater" in variation_updates[-1] and not "Heater" in schedule[timestamp]:
+			remove_heater_update = True
+		variation_updates[-1].update(schedule[timestamp])
+		if remove_heater_update:
+			variation_updates[-1].pop("Heater")
+		variation_updates.append(copy.deepcopy(variation_updates[index]))
+
+	return [list(i.items()) for i in variation_updates]
+
+
 
 	
 
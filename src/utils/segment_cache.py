@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import hashlib
+import pickle
+import tempfile
+import threading
+
+#increase, if the content of the cache files changes, to invalidate existing cache files
+SEGMENT_CACHE_VERSION = 1
+
+
+class SegmentCache:
+    '''
+    On-disk cache of the results of the time series (segments) of simulations with a schedule, shared by all
+    simulations of a series (and all worker processes).
+
+    At every retrofit, the FMU and the controllers are initialized anew with the updated parameters, so the results of a segment
+    only depend on its parameters, the converted variation carried over from the previous segment (e.g. the nominal heating power),
+    its start time and its halting points. Simulations sharing the same base building and retrofits (e.g. the same prefix
+    of a scenario tree) share these segments: every distinct segment is simulated once, the other simulations take its
+    result rows from the cache (see SimulationController.simulate_segments()).
+
+    A simulation that doesn't find a segment in the cache reserves it with a lock file, so that concurrent simulations
+    wait for its result instead of simulating it again. While the segment is simulated, a heartbeat thread of the owner
+    touches the lock file every heartbeat_interval seconds. A lock that wasn't touched for stale_timeout seconds
+    (e.g. of a killed process) is taken over by a waiting simulation.
+
+    Parameters:
+        cache_dir: directory of the cache files
+        heartbeat_interval: time in seconds between two touches of the lock file by its owner
+        stale_timeout: time in seconds without a touch, after which a lock is considered as left by a dead process
+    '''
+    def __init__(self, cache_dir, heartbeat_interval=5, stale_timeout=30):
+        self.cache_dir = cache_dir
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_timeout = stale_timeout
+        #heartbeats of the locks held by this process (key -> (threading.Event, threading.Thread))
+        self.heartbeats = dict()
+
+    @staticmethod
+    def get_key(segment_description: dict):
+        '''
+        Get the key of a segment.
+
+        Args:
+            - segment_description: dict of everything the results of the segment depend on
+                    (e.g. parameters, start time, halting points),
+                    values that aren't json serializable are converted to strings
+
+        Returns:
+            str: hex digest of the description
+        '''
+        description = json.dumps([SEGMENT_CACHE_VERSION, segment_description], sort_keys=True, default=str)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def get_path(self, key):
+        '''
+        Get the path of the cache file of a segment.
+        '''
+        return os.path.join(self.cache_dir, key+".pickle")
+
+    def get_lock_path(self, key):
+        '''
+        Get the path of the lock file of a segment.
+        '''
+        return os.path.join(self.cache_dir, key+".lock")
+
+    def load(self, key):
+        '''
+        Load a cached segment.
+
+        Returns:
+            dict of the segment (see store()), None if the segment isn't cached.
+        '''
+        path = self.get_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"#could not load cached segment {path} ({e}) - simulating the segment")
+            return None
+
+    def load_or_reserve(self, key):
+        '''
+        Load a cached segment or reserve it for simulating it. If the segment is reserved by another simulation,
+        wait for its result (polling with increasing intervals of up to 1 s).
+        If the lock of the other simulation gets stale, the segment is reserved for the caller.
+
+        Returns:
+            dict of the cached segment (see load()) or None, if the segment is reserved for the caller,
+            who has to store it (see store()) or release it (see release()).
+        '''
+        os.makedirs(self.cache_dir, exist_ok=True)
+        poll_interval = 0.01
+        while True:
+            cached = self.load(key)
+            if cached is not None:
+                return cached
+            if self.acquire(key):
+                return None
+            try:
+                b_stale = time.time() - os.path.getmtime(self.get_lock_path(key)) > self.stale_timeout
+            except OSError: #lock was just released
+                continue
+            if b_stale:
+                print(f"#taking over the stale lock of segment {key}")
+                self.release(key)
+                continue
+            time.sleep(poll_interval)
+            poll_interval = min(2*poll_interval, 1.0)
+
+    def acquire(self, key):
+        '''
+        Create the lock file of a segment and start its heartbeat.
+
+        Returns:
+            bool: True, if the lock was created by the caller, False if it exists already.
+        '''
+        try:
+            os.close(os.open(self.get_lock_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        b_stop = threading.Event()
+        heartbeat = threading.Thread(target=self.__touch_lock, args=(key, b_stop), daemon=True)
+        heartbeat.start()
+        self.heartbeats[key] = (b_stop, heartbeat)
+        return True
+
+    def __touch_lock(self, key, b_stop):
+        '''
+        Heartbeat of a lock: touches the lock file every heartbeat_interval seconds until b_stop is set.
+        '''
+        while not b_stop.wait(self.heartbeat_interval):
+            try:
+                os.utime(self.get_lock_path(key))
+            except OSError: #lock was taken over meanwhile
+                return
+
+    def store(self, key, segment: dict):
+        '''
+        Store a segment and release its reservation. The file is written to a temporary file first
+        which is renamed afterwards, so that concurrent simulations never load a partially written file.
+
+        Args:
+            - key: key of the segment (see get_key())
+            - segment: dict with the result rows of the segment "results", their header "out_cols" and
+                    the converted variation after the segment "converted_variation"
+        '''
+        tmp_file, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".pickle")
+        with os.fdopen(tmp_file, "wb") as f:
+            pickle.dump(segment, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.get_path(key))
+        self.release(key)
+
+    def release(self, key):
+        '''
+        Release the reservation of a segment: stop its heartbeat (if held by this process) and remove the lock file.
+        '''
+        if key in self.heartbeats:
+            b_stop, heartbeat = self.heartbeats.pop(key)
+            b_stop.set()
+            heartbeat.join()
+        try:
+            os.remove(self.get_lock_path(key))
+        except OSError:
+            pass
+
+
+def get_segment_report(segment_stats: list):
+    '''
+    Summarize the sharing of segments of a simulation series.
+
+    Args:
+        - segment_stats: list of SimulationController.segment_stats of the simulations
+
+    Returns:
+        str: report with the number of simulated and shared segments, None if no segments were cached
+    '''
+    n_simulated = sum(stats["simulated"] for stats in segment_stats)
+    n_shared = sum(stats["shared"] for stats in segment_stats)
+    if not n_simulated + n_shared:
+        return None
+    return f"schedule segments:\t{n_simulated} simulated, {n_shared} taken from simulations with the same segment"
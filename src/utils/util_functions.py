@@ -6,7 +6,12 @@ from typing import List
 import sys
 import os
 import pandas as pd
+import numpy as np
+import math
 import argparse
+import hashlib
+from src.utils.resource_cache import get_resource_cache
+from src.utils.resource_packs import load_resource_table,read_weather_table,read_profile_table
 
 
 
@@ -46,6 +51,10 @@ def load_json(path):
     for time_parameter_key in ["controller_step_size","start_time","stop_time","writer_step_size"]:
         if isinstance(to_return[time_parameter_key],str):
             to_return[time_parameter_key]=parse_duration(to_return[time_parameter_key])
+    #own control step sizes of single controllers
+    if isinstance(to_return.get("controller_step_sizes"),dict):
+        to_return["controller_step_sizes"]={controller_name:parse_duration(step_size) if isinstance(step_size,str) else step_size 
+                                            for controller_name,step_size in to_return["controller_step_sizes"].items()}
     return to_return
 
 
@@ -166,7 +175,8 @@ def get_step_size_arr(start_time, stop_time, writer_step_size, controller_step_s
         start_time (int): The start time of the simulation.
         stop_time (int): The end time of the simulation.
         writer_step_size (int): The time interval for writing output.
-        controller_step_size (int): The time interval for external controller input.
+        controller_step_size (int or list): The time interval for external controller input, 
+            or a list of the intervals of controllers with different step sizes.
         max_permitted_time_step (int): This parameter defines the maximum allowable 
             time step, expressed in seconds, that is consistent with the resolution 
             of the external input files. It ensures that the time intervals between 
@@ -175,26 +185,58 @@ def get_step_size_arr(start_time, stop_time, writer_step_size, controller_step_s
             In contrast to writer_step_size, it doesn't affect the the ability for events
             to be seen by the user in the results.
     Returns:
-        list: A list of step widths between sorted halting points.
+        np.ndarray: An integer array of step widths between sorted halting points.
 
     Raises:
         ValueError: If start_time is greater than stop_time or if step sizes are non-positive.
     '''
-    writer_halting_point_array = [i for i in range(start_time, stop_time + 1, writer_step_size)]
     #if controller_step_size is set to None (disabled due to missing controllers, etc.), 
     # set it to stop_time to effectually disable controller steps
-    controller_step_size=writer_step_size if controller_step_size==None else controller_step_size
-    controller_halting_point_array = [i for i in range(start_time, stop_time + 1, controller_step_size)]
-    if max_permitted_time_step < min(writer_step_size, controller_step_size):
-        required_halting_point_array=[i for i in range(start_time,stop_time+1, max_permitted_time_step)]
-        print(f"##Creating additional halting points because max_permitted_time_step(={max_permitted_time_step} s, based on model input files) is smaller than writer_step_size and controller_step_size")
-    else:
-        required_halting_point_array=[]
-    halting_point_set = set(writer_halting_point_array) | set(controller_halting_point_array) | set(required_halting_point_array)
-    sorted_halting_point_list = sorted(list(halting_point_set))
-    step_list = [sorted_halting_point_list[i] - sorted_halting_point_list[i-1] for i in range(1, len(sorted_halting_point_list))]
+    controller_step_sizes=sorted(set(controller_step_size)) if isinstance(controller_step_size, (list, tuple)) else [controller_step_size]
+    controller_step_sizes=[writer_step_size if step_size==None else step_size for step_size in controller_step_sizes]
+    grid_step_sizes=[writer_step_size, *controller_step_sizes]
+    if max_permitted_time_step < min(grid_step_sizes):
+        grid_step_sizes.append(max_permitted_time_step)
+        print(f"##Creating additional halting points because max_permitted_time_step(={max_permitted_time_step} s, based on model input files and accuracy profile) is smaller than writer_step_size and controller_step_size")
+    grid_step_sizes=[int(i) for i in grid_step_sizes]
+
+    #all grids start at start_time, so their halting points lie on a common grid with the greatest common divisor of the step sizes:
+    # mark the halting points of every grid in a boolean mask over the common grid (instead of building and sorting all points)
+    common_step_size=math.gcd(*grid_step_sizes)
+    n_common=(stop_time-start_time)//common_step_size+1
+    n_points=sum((stop_time-start_time)//step_size+1 for step_size in grid_step_sizes)
+
+    if n_common <= 16*n_points:
+        mask=np.zeros(n_common, dtype=bool)
+        for step_size in grid_step_sizes:
+            mask[::step_size//common_step_size]=True
+        sorted_halting_points=start_time+common_step_size*np.flatnonzero(mask)
+    else: #mask would be sparse (step sizes without large common divisor): sorted union of the halting points
+        sorted_halting_points=np.unique(np.concatenate([np.arange(start_time, stop_time + 1, step_size, dtype=np.int64) 
+                                                        for step_size in grid_step_sizes]))
+    step_arr = np.diff(sorted_halting_points)
+
+    return step_arr
+
+
+def run_length_encode_step_size_arr(step_size_arr):
+    '''
+    Run-length encodes an array of step widths (e.g. from get_step_size_arr), for example 
+    [60, 60, ..., 60, 900, 900] -> step 60 x 14, then 900 x 2.
+
+    Parameters:
+        step_size_arr (array-like): The step widths.
 
-    return step_list
+    Returns:
+        tuple: (step_sizes, counts), two np.ndarrays with the step width of every run and the number of steps in the run.
+            np.repeat(step_sizes, counts) restores the step widths.
+    '''
+    step_size_arr = np.asarray(step_size_arr)
+    if len(step_size_arr) == 0:
+        return step_size_arr[:0], np.empty(0, dtype=np.int64)
+    run_starts = np.concatenate(([0], np.flatnonzero(step_size_arr[1:] != step_size_arr[:-1]) + 1))
+    counts = np.diff(np.concatenate((run_starts, [len(step_size_arr)])))
+    return step_size_arr[run_starts], counts
 
 
 def setup_paths(user_config:dict):
@@ -208,7 +250,8 @@ def setup_paths(user_config:dict):
         - config_path (str): The path to the configuration JSON file.
         - fmu_path (str): The path to the FMU file.
         - output_path (str): The path to the output directory.
-        - schedule (dict): The parsed schedule, None if nothing was selected.
+        - schedules (list): tuples (<schedule name>, <parsed schedule>) of the selected schedules, 
+                [(None, None)] if nothing was selected. The name is None, if only one schedule was selected.
 
     Raises:
         OSError: If no FMU is defined for the current operating system.
@@ -216,7 +259,7 @@ def setup_paths(user_config:dict):
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-c", "--config", help=f"provide a custom configuration for the building that is simulated. Default: ./resources/configurations/{user_config["config_name"]}")
-    parser.add_argument("-s", "--schedule", help="provide a custom retrofit schedule, that is updates to building parameters or occupant habits. Defaults to no retrofits.")
+    parser.add_argument("-s", "--schedule", nargs="+", help="provide one or more custom retrofit schedules, that is updates to building parameters or occupant habits. Every variation is simulated with every schedule. Defaults to no retrofits.")
     parser.add_argument("--fmu", help=f"provide custom fmu. Default is ./resources/fmus/{user_config["fmu_name_linux"]} or resources/fmus/{user_config["fmu_name_windows"]} for linux and win32 respectively")
     parser.add_argument("-o", "--output", help=f"provide custom output folder. Default is ./{user_config["output_path"]}")
 
@@ -234,13 +277,19 @@ def setup_paths(user_config:dict):
 
     output_path = args.output if args.output else user_config["output_path"]
 
-    schedule_path = args.schedule if args.schedule else user_config["schedule_name"]
-    if schedule_path:
-        schedule = json.loads(open(schedule_path).read())
+    schedule_paths = args.schedule if args.schedule else user_config["schedule_name"]
+    if not schedule_paths:
+        schedules = [(None, None)]
     else:
-        schedule = None
+        if isinstance(schedule_paths, str):
+            schedule_paths = [schedule_paths]
+        schedules = [(os.path.splitext(os.path.basename(schedule_path))[0], json.loads(open(schedule_path).read())) 
+                     for schedule_path in schedule_paths]
+        #result directories are only named after the schedule, if there are several
+        if len(schedules) == 1:
+            schedules = [(None, schedules[0][1])]
 
-    return config_path, fmu_path, output_path, schedule
+    return config_path, fmu_path, output_path, schedules
 
 
 def load_weather_data(tr):
@@ -253,30 +302,37 @@ def load_weather_data(tr):
     Returns:
     pd.DataFrame: A DataFrame with weather data, indexed by time starting from January 1, 2025, 
                 and columns named according to the file header.
+
+    The file is parsed once per process (see ResourceCache), the returned DataFrame is shared and must not be modified.
     '''
     fname=tr["weaDat.fileName"]
     if isinstance(fname,list): fname=fname[0]
-    header=open(fname,"r").read().split("\n")[11:40]
-    df=pd.read_csv(fname, sep='\t', decimal='.', skiprows=40,header=None,index_col=0).iloc[:,0:29]
-    df.columns=header
+    return get_resource_cache().get(parse_weather_file,fname)
+
+def parse_weather_file(fname):
+    '''
+    Parse a Modelica weather file, see load_weather_data(). The table is read from its pack, if it is compiled (see resource_packs.py).
+    '''
+    df=load_resource_table(fname,read_weather_table)
     df.index=pd.to_timedelta(df.index,unit="s")+pd.to_datetime("2025-1-1")
     return df
 
 def load_internalGain_data(tr):
     '''
-    Load internal gain data from a specified file.
+    Load internal gain data from a specified file. The first column of the profile files is in minutes
+    (the model reads them with internalGain.timeScale=60).
 
     Parameters:
     tr (dict): A dictionary containing the key 'internalGain.fileName' with the path to the internal gain data file.
 
     Returns:
     pd.DataFrame: A DataFrame with internal gain data, indexed by time starting from January 1, 2025.
+
+    The file is parsed once per process (see ResourceCache), the returned DataFrame is shared and must not be modified.
     '''
     fname=tr["internalGain.fileName"]
     if isinstance(fname,list): fname=fname[0]
-    df=pd.read_csv(fname,sep="\t",skiprows=[1],index_col=0)
-    df.index=pd.to_timedelta(df.index,unit="h")+pd.to_datetime("2025-1-1")
-    return df
+    return get_resource_cache().get(parse_profile_file,fname)
 
 def load_hygienicalWindowOpening_data(tr):
     '''
@@ -287,13 +343,39 @@ def load_hygienicalWindowOpening_data(tr):
 
     Returns:
     pd.DataFrame: A DataFrame with hygienicalWindowOpening data, indexed by time starting from January 1, 2025.
+
+    The file is parsed once per process (see ResourceCache), the returned DataFrame is shared and must not be modified.
     '''
     fname=tr["hygienicalWindowOpening.fileName"]
     if isinstance(fname,list): fname=fname[0]
-    df=pd.read_csv(fname,sep="\t",skiprows=[1],index_col=0)
+    return get_resource_cache().get(parse_profile_file,fname)
+
+def parse_profile_file(fname):
+    '''
+    Parse a Modelica table file of a profile (internal gains, window opening) with the time in minutes, see load_internalGain_data().
+    The table is read from its pack, if it is compiled (see resource_packs.py).
+    '''
+    df=load_resource_table(fname,read_profile_table)
     df.index=pd.to_timedelta(df.index,unit="min")+pd.to_datetime("2025-1-1")
     return df
 
+def get_file_hash(path, chunk_size=1<<20):
+    '''
+    Calculate the SHA-256 hash of a file's content.
+
+    Parameters:
+    path (str): Path to the file.
+    chunk_size (int): Number of bytes read at once.
+
+    Returns:
+    str: The hex digest of the file's content.
+    '''
+    file_hash=hashlib.sha256()
+    with open(path,"rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
 def df_findcol(df,sstr,b_ignorecase=True):
     '''
     Search for columns in a pandas DataFrame that match a specified search string.